@@ -4,13 +4,15 @@ from flask_login import LoginManager
 from dotenv import load_dotenv
 import os
 
-from models import db
+from models import db, database_uri, engine_options
+from models.migrations import upgrade_schema
 from controllers.user_controller import user_bp, load_user
 from controllers.movie_controller import movie_bp
 from controllers.streaming_controller import streaming_bp
 from controllers.password_reset_controller import password_reset_bp
 from controllers.admin_controller import admin_bp
 from scheduler import init_scheduler
+from utils.http_cache import compress_response
 
 # Load environment variables from .env file
 load_dotenv()
@@ -18,7 +20,8 @@ load_dotenv()
 # Initialize Flask app
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key')
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///users.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = database_uri()
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options()
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
 # Configure CORS properly
@@ -29,7 +32,7 @@ CORS(app,
              "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
              "allow_headers": ["Content-Type"],
              "supports_credentials": True,
-             "expose_headers": ["Content-Type"]
+             "expose_headers": ["Content-Type", "ETag", "X-Next-Cursor"]
          }
      })
 
@@ -48,6 +51,9 @@ app.register_blueprint(streaming_bp, url_prefix='/api')
 app.register_blueprint(password_reset_bp, url_prefix='/api')
 app.register_blueprint(admin_bp, url_prefix='/api')
 
+# Compress large JSON responses
+app.after_request(compress_response)
+
 def reset_database():
     """Drop all tables and recreate them"""
     with app.app_context():
@@ -57,13 +63,14 @@ def reset_database():
         db.create_all()
         print("Database has been reset successfully!")
 
-# Create database tables
+# Create database tables and upgrade existing ones
 with app.app_context():
-    db.create_all()
+    upgrade_schema()
 
-# Initialize scheduler
-if not app.debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
-    init_scheduler()
+# Initialize scheduler, set SCHEDULER_ENABLED=false when the jobs run in worker.py instead
+SCHEDULER_ENABLED = os.getenv('SCHEDULER_ENABLED', 'true').lower() == 'true'
+if SCHEDULER_ENABLED and (not app.debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
+    init_scheduler(app)
 
 if __name__ == '__main__':
     # Check if we need to reset the database
@@ -1,10 +1,11 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, current_app
 from flask_login import login_required, current_user
 import os
 from dotenv import load_dotenv, set_key
 from pathlib import Path
-from scrapers.streaming_scraper import update_all_movies
-from models import db, User
+from scrapers.streaming_scraper import update_all_movies, start_run
+from models import db, User, Movie, ScrapeRun, ScrapeError, TrackedMovie, ServiceDemand
+from utils.pagination import page_size, paginate
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -25,13 +26,30 @@ def admin_required(f):
 @admin_bp.route('/admin/users', methods=['GET'])
 @admin_required
 def get_users():
-    users = User.query.all()
-    return jsonify([{
+    """One page of users ordered by id, the cursor of the next page is sent in X-Next-Cursor"""
+    try:
+        limit = page_size(request.args.get('limit'))
+    except ValueError:
+        return jsonify({"error": "Invalid limit"}), 400
+
+    query = User.query
+    if request.args.get('q'):
+        pattern = f"%{request.args['q']}%"
+        query = query.filter(db.or_(User.username.ilike(pattern), User.email.ilike(pattern)))
+    try:
+        users, next_cursor = paginate(query, [User.id], request.args.get('cursor'), limit)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    response = jsonify([{
         'id': user.id,
         'username': user.username,
         'email': user.email,
         'is_admin': is_admin(user)
     } for user in users])
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
 
 @admin_bp.route('/admin/users/<int:user_id>', methods=['DELETE'])
 @admin_required
@@ -41,13 +59,41 @@ def delete_user(user_id):
     
     user = User.query.get_or_404(user_id)
     try:
+        movie_ids = TrackedMovie.user_movie_ids(user.id)
+        ServiceDemand.adjust(user.streaming_services, (), user.region)
         db.session.delete(user)
+        TrackedMovie.refresh(movie_ids)
         db.session.commit()
         return jsonify({"message": f"User {user.username} deleted successfully"})
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
+@admin_bp.route('/admin/stats', methods=['GET'])
+@admin_required
+def get_stats():
+    watchers = db.func.sum(TrackedMovie.watcher_count)
+    most_watched = db.session.query(Movie.imdb_id, Movie.title, watchers,
+                                    db.func.sum(TrackedMovie.subscriber_count)).join(
+        TrackedMovie, TrackedMovie.movie_id == Movie.id
+    ).group_by(Movie.id).order_by(watchers.desc(), Movie.id).limit(10)
+    service_demand = {}
+    for demand in ServiceDemand.query.order_by(ServiceDemand.region, ServiceDemand.subscriber_count.desc()):
+        service_demand.setdefault(demand.region, {})[demand.service] = demand.subscriber_count
+    return jsonify({
+        "users": User.query.count(),
+        "movies": Movie.query.count(),
+        "tracked_movies": db.session.query(db.func.count(db.distinct(TrackedMovie.movie_id))).scalar(),
+        # (movie, region) pairs a full scrape run visits
+        "tracked_by_region": dict(db.session.query(TrackedMovie.region, db.func.count()).group_by(TrackedMovie.region)),
+        "watchers": db.session.query(db.func.coalesce(db.func.sum(TrackedMovie.watcher_count), 0)).scalar(),
+        "most_watched": [
+            {"imdb_id": imdb_id, "title": title, "watchers": watchers, "subscribers": subscribers}
+            for imdb_id, title, watchers, subscribers in most_watched
+        ],
+        "service_demand": service_demand
+    })
+
 @admin_bp.route('/admin/users/<int:user_id>/make-admin', methods=['POST'])
 @admin_required
 def make_admin(user_id):
@@ -125,16 +171,80 @@ def update_env_vars():
 @admin_required
 def trigger_scraping():
     try:
+        # Only one run at a time, across the scheduler and every process
+        run = start_run('full', current_user.id)
+        if run is None:
+            active = ScrapeRun.active()
+            return jsonify({
+                "error": "A scraping run is already in progress",
+                "run_id": active.id if active else None
+            }), 409
+
         # Run the scraping in a separate thread to not block the response
         from threading import Thread
-        thread = Thread(target=update_all_movies)
+        thread = Thread(target=update_all_movies, args=(current_app._get_current_object(),),
+                        kwargs={'run_id': run.id})
         thread.start()
         
         return jsonify({
             "message": "Scraping process started",
-            "status": "running"
-        })
+            "status": "running",
+            "run_id": run.id
+        }), 202
     except Exception as e:
         return jsonify({
             "error": f"Failed to start scraping: {str(e)}"
-        }), 500 
\ No newline at end of file
+        }), 500
+
+@admin_bp.route('/admin/scrape/<run_id>', methods=['GET'])
+@admin_required
+def get_scrape_run(run_id):
+    run = ScrapeRun.query.get_or_404(run_id)
+    result = run.to_dict()
+    result['errors'] = {
+        category: count for category, count in db.session.query(ScrapeError.category, ScrapeError.count).filter(
+            ScrapeError.run_id == run_id
+        )
+    }
+    return jsonify(result)
+
+@admin_bp.route('/admin/scrape/<run_id>', methods=['DELETE'])
+@admin_required
+def cancel_scrape_run(run_id):
+    run = ScrapeRun.query.get_or_404(run_id)
+    if run.status != 'running':
+        return jsonify({"error": f"Run is already {run.status}"}), 409
+
+    # Workers look for the flag between movies and stop after writing their current batch
+    try:
+        run.cancel_requested = True
+        db.session.commit()
+        return jsonify({"message": "Cancellation requested", "run_id": run.id}), 202
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+@admin_bp.route('/admin/scrape/<run_id>/resume', methods=['POST'])
+@admin_required
+def resume_scrape_run(run_id):
+    run = ScrapeRun.query.get_or_404(run_id)
+    if run.status not in ('cancelled', 'failed'):
+        return jsonify({"error": f"Run is {run.status}, only cancelled or failed runs can be resumed"}), 409
+
+    try:
+        if not ScrapeRun.resume(run.id):
+            active = ScrapeRun.active()
+            return jsonify({
+                "error": "A scraping run is already in progress",
+                "run_id": active.id if active else None
+            }), 409
+
+        # Movies that were already checkpointed are skipped
+        from threading import Thread
+        thread = Thread(target=update_all_movies, args=(current_app._get_current_object(),),
+                        kwargs={'run_id': run_id})
+        thread.start()
+        return jsonify({"message": "Scraping process resumed", "status": "running", "run_id": run_id}), 202
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"Failed to resume scraping: {str(e)}"}), 500
@@ -1,43 +1,41 @@
 from flask import Blueprint, jsonify, request
+import logging
+from sqlalchemy.orm import contains_eager
 from flask_login import login_required, current_user
-from models import db, Movie, MovieList, MovieInList
-import os
-import requests
+from models import db, Movie, MovieList, MovieInList, StreamingAvailability, TrackedMovie
+from utils.omdb_client import omdb
+from utils.http_cache import make_etag, not_modified, with_etag
+from utils.pagination import page_size, paginate
 
 movie_bp = Blueprint('movie', __name__)
+logger = logging.getLogger(__name__)
 
-OMDB_API_KEY = os.getenv('OMDB_API_KEY')
-OMDB_BASE_URL = 'http://www.omdbapi.com/'
+# Sort options of list entries, the entry id makes the order total for cursors
+ENTRY_SORT_COLUMNS = {
+    'added_at': [MovieInList.added_at, MovieInList.id],
+    'title': [Movie.title, MovieInList.id],
+    'year': [db.func.coalesce(Movie.year, ''), MovieInList.id],
+}
 
 def get_omdb_data(params):
-    try:
-        params['apikey'] = OMDB_API_KEY
-        response = requests.get(OMDB_BASE_URL, params=params)
-        response.raise_for_status()
-        return response.json()
-    except requests.RequestException as e:
-        print(f"OMDB API error: {str(e)}")
-        return None
-
-def cleanup_orphaned_entries():
-    """Remove MovieInList entries that point to non-existent movies."""
-    try:
-        # Find all MovieInList entries where the movie doesn't exist
-        orphaned = MovieInList.query.filter(
-            ~MovieInList.movie_id.in_(
-                db.session.query(Movie.id)
-            )
-        ).all()
-        
-        # Delete orphaned entries
-        for entry in orphaned:
-            db.session.delete(entry)
-        
-        db.session.commit()
-        print(f"Cleaned up {len(orphaned)} orphaned movie entries")
-    except Exception as e:
-        print(f"Error during cleanup: {str(e)}")
-        db.session.rollback()
+    return omdb.get(params)
+
+def availability_version(list_id):
+    """Changes whenever the availability of any movie on the list changes"""
+    return db.session.query(db.func.sum(Movie.availability_revision)).join(
+        MovieInList, MovieInList.movie_id == Movie.id
+    ).filter(MovieInList.list_id == list_id).scalar()
+
+def attach_availability(movies):
+    """Add the availability of all serialized entries with one query"""
+    availability = StreamingAvailability.for_movies(
+        [movie['movie_id'] for movie in movies],
+        current_user.streaming_services,
+        region=current_user.region,
+        subscribed_only=request.args.get('subscribed_only') == 'true'
+    )
+    for movie in movies:
+        movie['availability'] = availability[movie['movie_id']]
 
 @movie_bp.route('/movies/search', methods=['GET'])
 @login_required
@@ -55,9 +53,22 @@ def search_movies():
 @movie_bp.route('/movies/<imdb_id>', methods=['GET'])
 @login_required
 def get_movie_details(imdb_id):
+    # Tracked movies are served from the database, the backfill job keeps them fresh
+    movie = Movie.query.filter_by(imdb_id=imdb_id).first()
+    if movie and movie.details:
+        return jsonify(movie.details)
+
     data = get_omdb_data({'i': imdb_id})
     if not data or 'Error' in data:
         return jsonify({'error': 'Movie not found'}), 404
+
+    if movie:
+        try:
+            movie.store_details(data)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Could not store details for {imdb_id}: {str(e)}")
     
     return jsonify(data)
 
@@ -65,16 +76,34 @@ def get_movie_details(imdb_id):
 @login_required
 def get_movie_lists():
     try:
-        # Clean up orphaned entries before returning lists
-        cleanup_orphaned_entries()
-        
-        lists = MovieList.query.filter_by(user_id=current_user.id).order_by(
+        # Version of all the user's lists from one aggregate query, without loading them
+        count, revisions, last_id = db.session.query(
+            db.func.count(MovieList.id), db.func.sum(MovieList.revision), db.func.max(MovieList.id)
+        ).filter(MovieList.user_id == current_user.id).one()
+        summary = request.args.get('summary') == 'true'
+        etag = make_etag('lists', current_user.id, count, revisions, last_id, summary)
+        cached = not_modified(etag)
+        if cached:
+            return cached
+
+        if summary:
+            # Names and sizes only, no entries
+            movie_counts = dict(db.session.query(MovieInList.list_id, db.func.count(MovieInList.id)).join(
+                MovieList, MovieInList.list_id == MovieList.id
+            ).filter(MovieList.user_id == current_user.id).group_by(MovieInList.list_id))
+            lists = MovieList.query.filter_by(user_id=current_user.id).order_by(
+                MovieList.is_default.desc(),
+                MovieList.created_at.asc()
+            ).all()
+            return with_etag(jsonify([lst.summary_dict(movie_counts.get(lst.id, 0)) for lst in lists]), etag)
+
+        lists = MovieList.query.options(MovieList.load_entries()).filter_by(user_id=current_user.id).order_by(
             MovieList.is_default.desc(),
             MovieList.created_at.asc()
         ).all()
         result = [lst.to_dict() for lst in lists]
         print(f"Found {len(result)} lists: {[lst['name'] for lst in result]}")
-        return jsonify(result)
+        return with_etag(jsonify(result), etag)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -140,6 +169,8 @@ def add_movie_to_list(list_id):
     
     try:
         db.session.add(movie_in_list)
+        movie_list.touch()
+        TrackedMovie.refresh([movie.id])
         db.session.commit()
         return jsonify(movie_in_list.to_dict()), 201
     except Exception as e:
@@ -166,6 +197,8 @@ def remove_movie_from_list(list_id, imdb_id):
     
     try:
         db.session.delete(movie_in_list)
+        movie_list.touch()
+        TrackedMovie.refresh([movie.id])
         db.session.commit()
         return jsonify({'message': 'Movie removed from list'}), 200
     except Exception as e:
@@ -194,12 +227,84 @@ def delete_movie_list(list_id):
 @login_required
 def get_movie_list(list_id):
     try:
-        movie_list = MovieList.query.get_or_404(list_id)
+        stamp = db.session.query(MovieList.user_id, MovieList.revision).filter_by(id=list_id).first_or_404()
         
         # Check if user owns this list
-        if movie_list.user_id != current_user.id:
+        if stamp.user_id != current_user.id:
             return jsonify({'error': 'Unauthorized'}), 403
-        
-        return jsonify(movie_list.to_dict())
+
+        include_availability = 'availability' in request.args.get('include', '').split(',')
+        version = ['list', list_id, stamp.revision]
+        if include_availability:
+            version += [availability_version(list_id), current_user.region, sorted(current_user.streaming_services or []),
+                        request.args.get('subscribed_only')]
+        etag = make_etag(*version)
+        cached = not_modified(etag)
+        if cached:
+            return cached
+
+        movie_list = MovieList.query.options(MovieList.load_entries()).filter_by(id=list_id).first_or_404()
+        result = movie_list.to_dict()
+        if include_availability:
+            # All entries' availability in one query instead of one request per movie card
+            attach_availability(result['movies'])
+        return with_etag(jsonify(result), etag)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500 
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+@movie_bp.route('/movie-lists/<int:list_id>/movies', methods=['GET'])
+@login_required
+def get_movie_list_entries(list_id):
+    """One page of a list's entries, the cursor of the next page is sent in X-Next-Cursor.
+
+    Query parameters: limit, cursor, sort (added_at, title or year), order
+    (asc or desc), q (title contains), year, available=true (only movies on
+    the user's services) and include=availability.
+    """
+    stamp = db.session.query(MovieList.user_id, MovieList.revision).filter_by(id=list_id).first_or_404()
+    if stamp.user_id != current_user.id:
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    sort = request.args.get('sort', 'added_at')
+    if sort not in ENTRY_SORT_COLUMNS:
+        return jsonify({'error': f"sort must be one of {', '.join(ENTRY_SORT_COLUMNS)}"}), 400
+    descending = request.args.get('order', 'desc' if sort == 'added_at' else 'asc') == 'desc'
+    try:
+        limit = page_size(request.args.get('limit'))
+    except ValueError:
+        return jsonify({'error': 'Invalid limit'}), 400
+
+    services = current_user.streaming_services or []
+    etag = make_etag('entries', list_id, stamp.revision, availability_version(list_id), current_user.region,
+                     sorted(services),
+                     sorted(request.args.items(multi=True)))
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    query = MovieInList.query.join(Movie, MovieInList.movie_id == Movie.id).options(
+        contains_eager(MovieInList.movie_ref).load_only(Movie.imdb_id, Movie.title, Movie.poster, Movie.year)
+    ).filter(MovieInList.list_id == list_id)
+    if request.args.get('q'):
+        query = query.filter(Movie.title.ilike(f"%{request.args['q']}%"))
+    if request.args.get('year'):
+        query = query.filter(Movie.year == request.args['year'])
+    if request.args.get('available') == 'true':
+        query = query.filter(db.session.query(StreamingAvailability.id).filter(
+            StreamingAvailability.movie_id == Movie.imdb_id,
+            StreamingAvailability.region == current_user.region,
+            StreamingAvailability.service.in_(services)
+        ).exists())
+
+    try:
+        entries, next_cursor = paginate(query, ENTRY_SORT_COLUMNS[sort], request.args.get('cursor'), limit, descending)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    movies = [entry.to_dict() for entry in entries]
+    if 'availability' in request.args.get('include', '').split(','):
+        attach_availability(movies)
+    response = with_etag(jsonify(movies), etag)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response 
\ No newline at end of file
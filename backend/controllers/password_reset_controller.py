@@ -1,7 +1,7 @@
 from flask import Blueprint, jsonify, request, current_app
 from models import db, User
 from email_validator import validate_email, EmailNotValidError
-from utils.email_notifier import EmailNotifier
+from utils.mail_outbox import enqueue_email, send_soon, PRIORITY_TRANSACTIONAL
 
 password_reset_bp = Blueprint('password_reset', __name__)
 
@@ -30,8 +30,7 @@ def forgot_password():
     # Create reset link
     reset_link = f"http://localhost:3003/reset-password/{reset.token}"
 
-    # Send email
-    notifier = EmailNotifier()
+    # Queue the email, it is sent right away in the background
     try:
         msg = f"""
         Hello {user.username},
@@ -49,12 +48,18 @@ def forgot_password():
         WatchCall Team
         """
 
-        notifier.send_email(
+        message = enqueue_email(
             subject="WatchCall Password Reset",
             recipient=user.email,
-            body=msg
+            body=msg,
+            user_id=user.id,
+            priority=PRIORITY_TRANSACTIONAL
         )
+        db.session.commit()
+        # The link expires, don't wait for the next drain
+        send_soon(message)
     except Exception as e:
+        db.session.rollback()
         return jsonify({"error": "Failed to send reset email"}), 500
 
     return jsonify({
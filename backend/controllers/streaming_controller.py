@@ -1,11 +1,13 @@
 from flask import Blueprint, jsonify, request
 from flask_login import login_required, current_user
 from datetime import datetime
-from models import db, StreamingAvailability, User
+from models import db, Movie, StreamingAvailability, AvailabilityInterval, User, TrackedMovie, ServiceDemand
+from utils.http_cache import make_etag, not_modified, with_etag
+from utils.regions import REGIONS, is_valid_region, services_for
 
 streaming_bp = Blueprint('streaming', __name__)
 
-VALID_SERVICES = ['Netflix', 'Disney+', 'Amazon Prime', 'Apple TV+', 'Sky', 'WOW']
+MAX_BATCH_SIZE = 500
 
 def parse_date(date_str):
     if not date_str:
@@ -18,11 +20,56 @@ def parse_date(date_str):
 @streaming_bp.route('/streaming/<movie_id>', methods=['GET'])
 @login_required
 def get_streaming_availability(movie_id):
+    region = request.args.get('region', current_user.region)
+    revision = db.session.query(Movie.availability_revision).filter_by(imdb_id=movie_id).scalar()
+    etag = make_etag('availability', movie_id, region, revision)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
     availabilities = StreamingAvailability.query.filter_by(
         movie_id=movie_id,
-        region='DE'  # For now, hardcoded to Germany
+        region=region
     ).all()
-    return jsonify([avail.to_dict() for avail in availabilities])
+    return with_etag(jsonify([avail.to_dict() for avail in availabilities]), etag)
+
+@streaming_bp.route('/streaming/<movie_id>/timeline', methods=['GET'])
+@login_required
+def get_availability_timeline(movie_id):
+    """When the movie was available on which service, oldest first"""
+    region = request.args.get('region', current_user.region)
+    revision = db.session.query(Movie.availability_revision).filter_by(imdb_id=movie_id).scalar()
+    if revision is None:
+        return jsonify({"error": "Movie not found"}), 404
+    etag = make_etag('timeline', movie_id, region, revision)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    now = datetime.utcnow()
+    return with_etag(jsonify({
+        'movie_id': movie_id,
+        'region': region,
+        'intervals': [interval.to_dict(now) for interval in AvailabilityInterval.timeline(movie_id, region)]
+    }), etag)
+
+@streaming_bp.route('/streaming/batch', methods=['POST'])
+@login_required
+def get_streaming_availability_batch():
+    """Availability of many movies at once, flagged against the user's services"""
+    data = request.get_json()
+    movie_ids = data.get('movie_ids') if isinstance(data, dict) else None
+    if not isinstance(movie_ids, list) or not all(isinstance(movie_id, str) for movie_id in movie_ids):
+        return jsonify({"error": "movie_ids must be a list of IMDB ids"}), 400
+    if len(movie_ids) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"At most {MAX_BATCH_SIZE} movies per request"}), 400
+
+    return jsonify(StreamingAvailability.for_movies(
+        movie_ids,
+        current_user.streaming_services,
+        region=current_user.region,
+        subscribed_only=bool(data.get('subscribed_only'))
+    ))
 
 @streaming_bp.route('/streaming/<movie_id>', methods=['POST'])
 @login_required
@@ -31,10 +78,14 @@ def add_streaming_availability(movie_id):
     if not data:
         return jsonify({"error": "No data provided"}), 400
 
+    region = current_user.region
     service = data.get('service')
-    if not service or service not in VALID_SERVICES:
+    if not service or service not in services_for(region):
         return jsonify({"error": "Invalid streaming service"}), 400
 
+    if not Movie.query.filter_by(imdb_id=movie_id).first():
+        return jsonify({"error": "Movie not found"}), 404
+
     # Parse dates
     available_from = parse_date(data.get('available_from'))
     available_until = parse_date(data.get('available_until'))
@@ -43,7 +94,7 @@ def add_streaming_availability(movie_id):
     existing = StreamingAvailability.query.filter_by(
         movie_id=movie_id,
         service=service,
-        region='DE'
+        region=region
     ).first()
 
     if existing:
@@ -58,10 +109,12 @@ def add_streaming_availability(movie_id):
             service=service,
             available_from=available_from,
             available_until=available_until,
-            region='DE',
+            region=region,
             added_by_user_id=current_user.id
         )
         db.session.add(availability)
+        AvailabilityInterval.record(movie_id, region, [service], [])
+    Movie.bump_availability_revision(movie_id)
 
     try:
         db.session.commit()
@@ -81,6 +134,8 @@ def delete_streaming_availability(movie_id, availability_id):
 
     try:
         db.session.delete(availability)
+        AvailabilityInterval.record(movie_id, availability.region, [], [availability.service])
+        Movie.bump_availability_revision(movie_id)
         db.session.commit()
         return jsonify({"message": "Streaming availability deleted successfully"})
     except Exception as e:
@@ -90,12 +145,16 @@ def delete_streaming_availability(movie_id, availability_id):
 @streaming_bp.route('/services', methods=['GET'])
 @login_required
 def get_services():
-    return jsonify(VALID_SERVICES)
+    """Streaming services offered in a region, the user's own by default"""
+    region = request.args.get('region', current_user.region)
+    if not is_valid_region(region):
+        return jsonify({"error": f"Invalid region: {region}"}), 400
+    return jsonify(services_for(region))
 
 @streaming_bp.route('/user/services', methods=['GET'])
 @login_required
 def get_user_services():
-    return jsonify(current_user.streaming_services or [])
+    return jsonify(current_user.streaming_services)
 
 @streaming_bp.route('/user/services', methods=['PUT'])
 @login_required
@@ -105,14 +164,50 @@ def update_user_services():
         return jsonify({"error": "Invalid data format. Expected list of services"}), 400
     
     # Validate services
+    offered = services_for(current_user.region)
     for service in data:
-        if service not in VALID_SERVICES:
+        if service not in offered:
             return jsonify({"error": f"Invalid streaming service: {service}"}), 400
     
     try:
+        had_services = bool(current_user.streaming_services)
+        ServiceDemand.adjust(current_user.streaming_services, data, current_user.region)
         current_user.streaming_services = data
+        if had_services != bool(data):
+            # The user now counts as a subscriber for their movies, or no longer does
+            TrackedMovie.refresh(TrackedMovie.user_movie_ids(current_user.id))
         db.session.commit()
         return jsonify({"message": "Streaming services updated successfully"})
     except Exception as e:
         db.session.rollback()
-        return jsonify({"error": str(e)}), 500 
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500 
+
+@streaming_bp.route('/user/region', methods=['GET'])
+@login_required
+def get_user_region():
+    return jsonify({'region': current_user.region, 'regions': list(REGIONS)})
+
+@streaming_bp.route('/user/region', methods=['PUT'])
+@login_required
+def update_user_region():
+    """Move the user to another region, dropping subscriptions to services not offered there"""
+    data = request.get_json()
+    region = data.get('region') if isinstance(data, dict) else None
+    if not is_valid_region(region):
+        return jsonify({"error": f"Invalid region: {region}"}), 400
+    if region == current_user.region:
+        return jsonify({'region': region, 'streaming_services': current_user.streaming_services})
+
+    try:
+        old_region, old_services = current_user.region, current_user.streaming_services
+        offered = services_for(region)
+        ServiceDemand.adjust(old_services, [], old_region)
+        ServiceDemand.adjust([], [service for service in old_services if service in offered], region)
+        current_user.move_to_region(region, offered)
+        # The user's movies are now tracked in the new region
+        TrackedMovie.refresh(TrackedMovie.user_movie_ids(current_user.id))
+        db.session.commit()
+        return jsonify({'region': current_user.region, 'streaming_services': current_user.streaming_services})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
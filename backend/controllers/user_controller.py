@@ -118,5 +118,6 @@ def get_user():
         "id": current_user.id,
         "username": current_user.username,
         "email": current_user.email,
+        "region": current_user.region,
         "is_admin": is_admin(current_user)
     }) 
\ No newline at end of file
@@ -1,10 +1,73 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import os
+import sqlite3
 
 db = SQLAlchemy()
 
+# SQLite profile for several processes and threads writing to one file: in WAL mode readers
+# don't block behind a writer, and writers wait for the lock instead of failing right away
+SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))
+SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+SQLITE_CACHE_SIZE_KB = int(os.getenv('SQLITE_CACHE_SIZE_KB', 64 * 1024))
+
+POOL_OPTIONS = (
+    ('DB_POOL_SIZE', 'pool_size', int),
+    ('DB_MAX_OVERFLOW', 'max_overflow', int),
+    ('DB_POOL_TIMEOUT', 'pool_timeout', float),
+    ('DB_POOL_RECYCLE', 'pool_recycle', int),
+)
+
+def database_uri():
+    """DATABASE_URL from the environment, defaults to the SQLite file in the instance folder"""
+    uri = os.getenv('DATABASE_URL', 'sqlite:///users.db')
+    # Hosting providers still hand out the scheme SQLAlchemy dropped
+    if uri.startswith('postgres://'):
+        uri = 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+def engine_options():
+    """Connection pool settings from the environment, for SQLALCHEMY_ENGINE_OPTIONS"""
+    options = {'pool_pre_ping': True}
+    for name, option, cast in POOL_OPTIONS:
+        if os.getenv(name):
+            options[option] = cast(os.getenv(name))
+    return options
+
+@event.listens_for(Engine, 'connect')
+def _set_sqlite_pragma(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        # SQLite only enforces foreign keys (and ON DELETE actions) when asked to
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.execute(f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}')
+        cursor.execute(f'PRAGMA journal_mode={SQLITE_JOURNAL_MODE}')
+        # Safe in WAL mode, a power loss can only lose the last commits, not corrupt the file
+        cursor.execute(f'PRAGMA synchronous={SQLITE_SYNCHRONOUS}')
+        cursor.execute(f'PRAGMA mmap_size={SQLITE_MMAP_SIZE}')
+        # Negative values are in KiB instead of pages
+        cursor.execute(f'PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}')
+        cursor.execute('PRAGMA temp_store=MEMORY')
+        cursor.close()
+
+from .user_service import UserService
 from .user import User
 from .movie import Movie
 from .movie_list import MovieList
 from .movie_in_list import MovieInList
 from .streaming_availability import StreamingAvailability
-from .password_reset import PasswordReset 
\ No newline at end of file
+from .password_reset import PasswordReset
+from .streaming_url import StreamingUrl
+from .availability_match import AvailabilityMatch
+from .availability_interval import AvailabilityInterval
+from .outbox_email import OutboxEmail
+from .scrape_error import ScrapeError
+from .scrape_run import ScrapeRun
+from .scrape_item import ScrapeItem
+from .lease import Lease
+from .host_throttle import HostThrottle
+from .tracked_movie import TrackedMovie
+from .service_demand import ServiceDemand
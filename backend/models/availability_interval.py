@@ -0,0 +1,85 @@
+from datetime import datetime
+from . import db
+from .movie import Movie
+
+class AvailabilityInterval(db.Model):
+    """A stretch of time a movie was available on a service.
+
+    Append-only history: an interval is opened when a service appears and
+    closed when it disappears, so the table grows with the number of changes
+    instead of with days times movies. last_seen is the last check that still
+    found the service and closed_at the first one that did not; both are NULL
+    while the interval is open.
+    """
+    __table_args__ = (
+        db.Index('ix_availability_interval_movie_region_service', 'movie_id', 'region', 'service', 'first_seen'),
+        db.Index('ix_availability_interval_service_region_first_seen', 'service', 'region', 'first_seen'),
+        db.Index('ix_availability_interval_service_region_closed_at', 'service', 'region', 'closed_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    movie_id = db.Column(db.String(20), db.ForeignKey('movie.imdb_id', ondelete='CASCADE'), nullable=False)  # IMDB ID
+    service = db.Column(db.String(50), nullable=False)
+    region = db.Column(db.String(10), nullable=False, default='DE')
+    first_seen = db.Column(db.DateTime, nullable=False)
+    last_seen = db.Column(db.DateTime, nullable=True)
+    closed_at = db.Column(db.DateTime, nullable=True)
+
+    @staticmethod
+    def record(movie_id, region, added, removed, now=None):
+        """Open intervals for added services and close those of removed ones, the caller commits"""
+        now = now or datetime.utcnow()
+        if removed:
+            # The previous check of the movie is the last one that still found the services
+            last_checked_at = db.session.query(Movie.last_checked_at).filter_by(imdb_id=movie_id).scalar() or now
+            last_seen = db.case(
+                (AvailabilityInterval.first_seen > last_checked_at, AvailabilityInterval.first_seen),
+                else_=last_checked_at
+            )
+            AvailabilityInterval.query.filter(
+                AvailabilityInterval.movie_id == movie_id,
+                AvailabilityInterval.region == region,
+                AvailabilityInterval.service.in_(removed),
+                AvailabilityInterval.closed_at.is_(None)
+            ).update({'last_seen': last_seen, 'closed_at': now}, synchronize_session=False)
+        db.session.add_all([
+            AvailabilityInterval(movie_id=movie_id, service=service, region=region, first_seen=now)
+            for service in added
+        ])
+
+    @staticmethod
+    def backfill():
+        """Open intervals for current availability that has none yet, returns how many; the caller commits"""
+        from .streaming_availability import StreamingAvailability
+        has_open_interval = db.select(AvailabilityInterval.id).where(
+            AvailabilityInterval.movie_id == StreamingAvailability.movie_id,
+            AvailabilityInterval.service == StreamingAvailability.service,
+            AvailabilityInterval.region == StreamingAvailability.region,
+            AvailabilityInterval.closed_at.is_(None)
+        ).exists()
+        selected = db.select(
+            StreamingAvailability.movie_id, StreamingAvailability.service, StreamingAvailability.region,
+            db.func.coalesce(StreamingAvailability.created_at, db.func.current_timestamp())
+        ).where(~has_open_interval)
+        return db.session.execute(AvailabilityInterval.__table__.insert().from_select(
+            ['movie_id', 'service', 'region', 'first_seen'], selected
+        )).rowcount
+
+    @staticmethod
+    def timeline(movie_id, region='DE'):
+        """All intervals of a movie, oldest first"""
+        return AvailabilityInterval.query.filter_by(movie_id=movie_id, region=region).order_by(
+            AvailabilityInterval.first_seen, AvailabilityInterval.service
+        ).all()
+
+    def to_dict(self, now=None):
+        end = self.closed_at or now or datetime.utcnow()
+        return {
+            'service': self.service,
+            'region': self.region,
+            'first_seen': self.first_seen.isoformat(),
+            'last_seen': self.last_seen.isoformat() if self.last_seen else None,
+            'closed_at': self.closed_at.isoformat() if self.closed_at else None,
+            'open': self.closed_at is None,
+            'days': round((end - self.first_seen).total_seconds() / 86400, 1)
+        }
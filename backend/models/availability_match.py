@@ -0,0 +1,27 @@
+from datetime import datetime
+from . import db
+
+class AvailabilityMatch(db.Model):
+    """A movie on a user's list that became available on one of their services"""
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'movie_id', 'service', 'region', name='uq_availability_match'),
+        db.Index('ix_availability_match_movie_service_region', 'movie_id', 'service', 'region'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    movie_id = db.Column(db.String(20), db.ForeignKey('movie.imdb_id', ondelete='CASCADE'), nullable=False)  # IMDB ID
+    service = db.Column(db.String(50), nullable=False)
+    region = db.Column(db.String(10), nullable=False, default='DE')
+    matched_at = db.Column(db.DateTime, default=datetime.utcnow)
+    notified_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'movie_id': self.movie_id,
+            'service': self.service,
+            'region': self.region,
+            'matched_at': self.matched_at.isoformat(),
+            'notified_at': self.notified_at.isoformat() if self.notified_at else None
+        }
@@ -0,0 +1,64 @@
+from sqlalchemy.exc import IntegrityError
+from . import db
+
+# Conflicting updates from other processes are retried this often before giving up
+UPDATE_ATTEMPTS = 10
+
+class HostThrottle(db.Model):
+    """Politeness state of a scraped host, shared by the scrapers of every process.
+
+    Holds the adaptive request rate and the next free request slot, so all
+    processes together stay within one budget, a pause the site asked for
+    (Retry-After) and the circuit breaker. Rows are changed with a
+    compare-and-set on version through their own connection, so the callers'
+    sessions and transactions are left alone.
+    """
+    host = db.Column(db.String(255), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    rate = db.Column(db.Float, nullable=True)  # requests per second, None until first adapted
+    latency = db.Column(db.Float, nullable=True)  # moving average in seconds
+    next_slot_at = db.Column(db.DateTime, nullable=True)
+    paused_until = db.Column(db.DateTime, nullable=True)
+    failures = db.Column(db.Integer, nullable=False, default=0)  # structural failures in a row
+    cooldown = db.Column(db.Integer, nullable=True)  # seconds, None for the breaker's base cooldown
+    opened_until = db.Column(db.DateTime, nullable=True)
+    probing = db.Column(db.Boolean, nullable=False, default=False)
+
+    @staticmethod
+    def read(host):
+        """Current state of a host as a dict, None if it was never throttled"""
+        table = HostThrottle.__table__
+        with db.engine.connect() as conn:
+            row = conn.execute(db.select(table).where(table.c.host == host)).mappings().first()
+        return dict(row) if row else None
+
+    @staticmethod
+    def update(host, change):
+        """Apply change(state) -> {column: value} to the host's row and commit.
+
+        change sees the current state (columns as a dict) and returns the
+        values to write, or nothing to leave the row alone. It is called
+        again with fresh state whenever another process changed the row in
+        between. Returns (state, values) of the attempt that was applied.
+        """
+        table = HostThrottle.__table__
+        for _ in range(UPDATE_ATTEMPTS):
+            state = HostThrottle.read(host)
+            if state is None:
+                try:
+                    with db.engine.begin() as conn:
+                        conn.execute(table.insert().values(host=host, version=0, failures=0, probing=False))
+                except IntegrityError:
+                    pass  # Created by another process at the same time
+                continue
+
+            values = change(state)
+            if not values:
+                return state, {}
+            with db.engine.begin() as conn:
+                updated = conn.execute(table.update().where(
+                    table.c.host == host, table.c.version == state['version']
+                ).values(version=state['version'] + 1, **values)).rowcount
+            if updated:
+                return state, values
+        raise RuntimeError(f"Could not update the throttle of {host}, too many concurrent changes")
@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta
+import os
+import socket
+from sqlalchemy.exc import IntegrityError
+from . import db
+
+def instance_id():
+    """Identifies this process across hosts; evaluated per call so forked workers differ"""
+    return f'{socket.gethostname()}-{os.getpid()}'
+
+class Lease(db.Model):
+    """A named lock held by one process until it expires, e.g. the scheduler leadership"""
+    name = db.Column(db.String(50), primary_key=True)
+    holder = db.Column(db.String(255), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    @staticmethod
+    def acquire(name, ttl, holder=None):
+        """Take or renew the lease and commit, returns whether this process holds it now"""
+        holder = holder or instance_id()
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=ttl)
+        # Conditional update, an expired lease goes to whoever asks first
+        acquired = Lease.query.filter(
+            Lease.name == name,
+            db.or_(Lease.holder == holder, Lease.expires_at < now)
+        ).update({'holder': holder, 'expires_at': expires_at}, synchronize_session=False)
+        if not acquired and db.session.get(Lease, name) is None:
+            db.session.add(Lease(name=name, holder=holder, expires_at=expires_at))
+            acquired = 1
+        try:
+            db.session.commit()
+            return bool(acquired)
+        except IntegrityError:
+            # Another process created the lease at the same time
+            db.session.rollback()
+            return False
+
+    @staticmethod
+    def release(name, holder=None):
+        """Give the lease up early so another process can take over right away"""
+        Lease.query.filter_by(name=name, holder=holder or instance_id()).delete(synchronize_session=False)
+        db.session.commit()
@@ -0,0 +1,221 @@
+import logging
+from sqlalchemy import inspect, text, ForeignKeyConstraint, PrimaryKeyConstraint, UniqueConstraint
+from sqlalchemy.schema import AddConstraint, CreateTable
+
+from . import db
+
+logger = logging.getLogger(__name__)
+
+def upgrade_schema():
+    """Bring an existing database up to date with the models.
+
+    db.create_all() only creates missing tables, so columns, constraints and
+    indexes that were added to existing models later are created here as well.
+    SQLite cannot add constraints to an existing table, so such tables are
+    rebuilt and their rows copied over. Tables derived from existing data are
+    filled once, when they are created.
+    """
+    existing_tables = set(inspect(db.engine).get_table_names())
+    db.create_all()
+
+    with db.engine.connect() as conn:
+        if conn.dialect.name == 'sqlite':
+            # Rebuilding a table drops it, which must not cascade into its children
+            conn.exec_driver_sql('PRAGMA foreign_keys=OFF')
+            conn.commit()
+        try:
+            with conn.begin():
+                _upgrade_tables(conn)
+                _migrate_user_services(conn)
+        finally:
+            if conn.dialect.name == 'sqlite':
+                conn.exec_driver_sql('PRAGMA foreign_keys=ON')
+                conn.commit()
+
+    _fill_new_tables(set(db.metadata.tables) - existing_tables)
+
+def _upgrade_tables(conn):
+    for table in db.metadata.sorted_tables:
+        inspector = inspect(conn)
+        existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+        missing_columns = [column for column in table.columns if column.name not in existing_columns]
+        for column in missing_columns:
+            _add_column(conn, table, column)
+        if missing_columns:
+            inspector = inspect(conn)
+
+        if _missing_constraints(inspector, table):
+            if conn.dialect.name == 'sqlite':
+                _rebuild_table(conn, inspector, table)
+            else:
+                _alter_constraints(conn, inspector, table)
+            inspector = inspect(conn)
+
+        existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                logger.info(f"Creating index {index.name}")
+                index.create(conn)
+
+def _migrate_user_services(conn):
+    """Move subscriptions from the old user.streaming_services JSON list into user_service rows"""
+    user = db.metadata.tables['user']
+    user_service = db.metadata.tables['user_service']
+    rows = conn.execute(db.select(user.c.id, user.c.streaming_services).where(
+        user.c.streaming_services.isnot(None)
+    )).fetchall()
+    migrated = 0
+    for user_id, services in rows:
+        existing = set(conn.execute(db.select(user_service.c.service).where(
+            user_service.c.user_id == user_id, user_service.c.region == 'DE'
+        )).scalars())
+        for service in dict.fromkeys(services or ()):
+            if service not in existing:
+                conn.execute(user_service.insert().values(user_id=user_id, service=service, region='DE'))
+                migrated += 1
+    if rows:
+        conn.execute(user.update().where(user.c.streaming_services.isnot(None)).values(streaming_services=db.null()))
+        logger.info(f"Migrated {migrated} streaming service subscriptions of {len(rows)} users")
+
+def _fill_new_tables(created):
+    """Derive the contents of tables that did not exist before from the existing data"""
+    from . import TrackedMovie, ServiceDemand, AvailabilityInterval
+    if created & {'tracked_movie', 'service_demand'}:
+        tracked = TrackedMovie.rebuild()
+        ServiceDemand.rebuild()
+        logger.info(f"Counted the watchers of {tracked} tracked movies")
+    if 'availability_interval' in created:
+        opened = AvailabilityInterval.backfill()
+        logger.info(f"Opened {opened} availability intervals for existing availability")
+    db.session.commit()
+
+def _add_column(conn, table, column):
+    column_type = column.type.compile(dialect=conn.dialect)
+    ddl = f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'
+    default = conn.dialect.ddl_compiler(conn.dialect, None).get_column_default_string(column)
+    if default is not None:
+        # Existing rows take the default, so the column can be NOT NULL right away
+        ddl += f' DEFAULT {default}'
+        if not column.nullable:
+            ddl += ' NOT NULL'
+    logger.info(f"Adding column {table.name}.{column.name}")
+    conn.execute(text(ddl))
+
+def _unique_signature(columns):
+    return tuple(sorted(columns))
+
+def _primary_key_signature(columns):
+    return ('PRIMARY KEY',) + tuple(sorted(columns))
+
+def _foreign_key_signature(columns, referred_table, referred_columns, ondelete):
+    return (tuple(columns), referred_table, tuple(referred_columns), (ondelete or 'NO ACTION').upper())
+
+def _model_constraints(table):
+    constraints = {}
+    for constraint in table.constraints:
+        if isinstance(constraint, PrimaryKeyConstraint):
+            constraints[_primary_key_signature(c.name for c in constraint.columns)] = constraint
+        elif isinstance(constraint, UniqueConstraint):
+            constraints[_unique_signature(c.name for c in constraint.columns)] = constraint
+        elif isinstance(constraint, ForeignKeyConstraint):
+            constraints[_foreign_key_signature(
+                [c.name for c in constraint.columns],
+                constraint.referred_table.name,
+                [element.column.name for element in constraint.elements],
+                constraint.ondelete
+            )] = constraint
+    return constraints
+
+def _database_constraints(inspector, table):
+    constraints = {}
+    primary_key = inspector.get_pk_constraint(table.name)
+    if primary_key.get('constrained_columns'):
+        constraints[_primary_key_signature(primary_key['constrained_columns'])] = dict(primary_key, kind='primary key')
+    for unique in inspector.get_unique_constraints(table.name):
+        constraints[_unique_signature(unique['column_names'])] = unique
+    for fk in inspector.get_foreign_keys(table.name):
+        constraints[_foreign_key_signature(
+            fk['constrained_columns'],
+            fk['referred_table'],
+            fk['referred_columns'],
+            fk.get('options', {}).get('ondelete')
+        )] = fk
+    return constraints
+
+def _missing_constraints(inspector, table):
+    existing = _database_constraints(inspector, table)
+    return [constraint for signature, constraint in _model_constraints(table).items() if signature not in existing]
+
+def _alter_constraints(conn, inspector, table):
+    wanted = _model_constraints(table)
+    for signature, reflected in _database_constraints(inspector, table).items():
+        if signature not in wanted and reflected.get('name'):
+            logger.info(f"Dropping constraint {reflected['name']} on {table.name}")
+            conn.execute(text(f'ALTER TABLE "{table.name}" DROP CONSTRAINT "{reflected["name"]}"'))
+    for constraint in _missing_constraints(inspector, table):
+        logger.info(f"Adding constraint {constraint} to {table.name}")
+        conn.execute(AddConstraint(constraint))
+
+def _rebuild_table(conn, inspector, table):
+    """Recreate a SQLite table with the model's definition and copy its rows.
+
+    Follows the procedure from https://www.sqlite.org/lang_altertable.html:
+    create the new table under a temporary name, copy, drop the old one and
+    rename. Of rows that would violate a new unique constraint only the
+    first is kept, references that would violate a new foreign key are
+    dropped (or nulled where the column allows it). Any other violation,
+    like a NULL in a column that became NOT NULL, fails the rebuild.
+    """
+    logger.info(f"Rebuilding table {table.name} to add constraints")
+    temp_name = f'_new_{table.name}'
+    existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+    columns = [column for column in table.columns if column.name in existing_columns]
+
+    # Index names are global in SQLite, they are recreated after the rename
+    for index in inspector.get_indexes(table.name):
+        if index.get('name') and not index['name'].startswith('sqlite_autoindex'):
+            conn.execute(text(f'DROP INDEX "{index["name"]}"'))
+
+    quoted_name = conn.dialect.identifier_preparer.quote(table.name)
+    create_table = str(CreateTable(table).compile(dialect=conn.dialect)).strip()
+    conn.execute(text(create_table.replace(f'CREATE TABLE {quoted_name} ', f'CREATE TABLE "{temp_name}" ', 1)))
+
+    select_columns = []
+    conditions = []
+    for column in columns:
+        expression = f'"{column.name}"'
+        for fk in column.foreign_keys:
+            reference = f'SELECT "{fk.column.name}" FROM "{fk.column.table.name}"'
+            if column.nullable:
+                expression = f'CASE WHEN "{column.name}" IN ({reference}) THEN "{column.name}" END'
+            else:
+                conditions.append(f'"{column.name}" IN ({reference})')
+        select_columns.append(expression)
+
+    # Keep the first of the rows sharing a key, NULLs never match so those are all kept
+    for constraint in table.constraints:
+        if not isinstance(constraint, (PrimaryKeyConstraint, UniqueConstraint)):
+            continue
+        key = [column.name for column in constraint.columns]
+        if not key or not set(key) <= existing_columns:
+            continue
+        matches = ' AND '.join(f'earlier."{name}" = "{table.name}"."{name}"' for name in key)
+        conditions.append(
+            f'NOT EXISTS (SELECT 1 FROM "{table.name}" AS earlier '
+            f'WHERE earlier.rowid < "{table.name}".rowid AND {matches})'
+        )
+
+    column_list = ', '.join(f'"{column.name}"' for column in columns)
+    where = f' WHERE {" AND ".join(conditions)}' if conditions else ''
+    copied = conn.execute(text(
+        f'INSERT INTO "{temp_name}" ({column_list}) '
+        f'SELECT {", ".join(select_columns)} FROM "{table.name}"{where} ORDER BY rowid'
+    )).rowcount
+    total = conn.execute(text(f'SELECT COUNT(*) FROM "{table.name}"')).scalar()
+    if copied != total:
+        logger.warning(f"Dropped {total - copied} rows of {table.name} violating the new constraints")
+
+    conn.execute(text(f'DROP TABLE "{table.name}"'))
+    conn.execute(text(f'ALTER TABLE "{temp_name}" RENAME TO "{table.name}"'))
+    for index in table.indexes:
+        index.create(conn)
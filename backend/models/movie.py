@@ -9,9 +9,42 @@ class Movie(db.Model):
     year = db.Column(db.String(10))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Refresh planning, see scrapers/refresh_planner.py
+    last_checked_at = db.Column(db.DateTime, nullable=True)
+    availability_changed_at = db.Column(db.DateTime, nullable=True)
+    next_check_at = db.Column(db.DateTime, nullable=True, index=True)
+
+    # Full OMDb detail payload (plot, runtime, genres, ratings, ...), see utils/movie_details.py
+    details = db.Column(db.JSON, nullable=True)
+    details_fetched_at = db.Column(db.DateTime, nullable=True, index=True)
+
+    # Bumped whenever the movie's streaming availability changes, used for ETags
+    availability_revision = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # Define relationship with MovieInList
-    list_entries = db.relationship('MovieInList', back_populates='movie_ref', lazy=True)
+    list_entries = db.relationship('MovieInList', back_populates='movie_ref', lazy=True,
+                                   cascade='all, delete-orphan', passive_deletes=True)
+    availabilities = db.relationship('StreamingAvailability', back_populates='movie', lazy=True,
+                                     cascade='all, delete-orphan', passive_deletes=True)
+
+    @staticmethod
+    def bump_availability_revision(imdb_id):
+        """Mark the availability of a movie as changed, the caller commits"""
+        Movie.query.filter_by(imdb_id=imdb_id).update(
+            {Movie.availability_revision: Movie.availability_revision + 1}, synchronize_session=False
+        )
+
+    def store_details(self, data):
+        """Keep an OMDb detail response and refresh the basic fields from it"""
+        self.details = data
+        self.details_fetched_at = datetime.utcnow()
+        if data.get('Poster') and data['Poster'] != 'N/A' and data['Poster'] != self.poster:
+            self.poster = data['Poster']
+            if self.id is not None:
+                # Lists serialize the poster, so their cached versions are stale now
+                from .movie_list import MovieList
+                MovieList.touch_containing(self.id)
 
     def to_dict(self):
         return {
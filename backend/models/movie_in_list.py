@@ -2,9 +2,14 @@ from datetime import datetime
 from . import db
 
 class MovieInList(db.Model):
+    __table_args__ = (
+        db.Index('ix_movie_in_list_list_movie', 'list_id', 'movie_id'),
+        db.Index('ix_movie_in_list_movie', 'movie_id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
-    movie_id = db.Column(db.Integer, db.ForeignKey('movie.id'), nullable=False)
-    list_id = db.Column(db.Integer, db.ForeignKey('movie_list.id'), nullable=False)
+    movie_id = db.Column(db.Integer, db.ForeignKey('movie.id', ondelete='CASCADE'), nullable=False)
+    list_id = db.Column(db.Integer, db.ForeignKey('movie_list.id', ondelete='CASCADE'), nullable=False)
     added_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Define relationships with back_populates
@@ -23,12 +28,12 @@ class MovieInList(db.Model):
                 'added_at': self.added_at.isoformat()
             }
         
-        movie_data = self.movie_ref.to_dict()
+        movie = self.movie_ref
         return {
             'id': self.id,
-            'movie_id': movie_data['imdb_id'],  # Use IMDB ID as movie_id
-            'title': movie_data['title'],
-            'poster': movie_data['poster'],
-            'year': movie_data['year'],
+            'movie_id': movie.imdb_id,  # Use IMDB ID as movie_id
+            'title': movie.title,
+            'poster': movie.poster,
+            'year': movie.year,
             'added_at': self.added_at.isoformat()
         } 
\ No newline at end of file
@@ -1,14 +1,55 @@
 from datetime import datetime
+from sqlalchemy.orm import selectinload
 from . import db
+from .movie import Movie
+from .movie_in_list import MovieInList
 
 class MovieList(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_default = db.Column(db.Boolean, default=False)
-    movies = db.relationship('MovieInList', back_populates='list', lazy=True, cascade='all, delete-orphan')
+    # Bumped on every change of the list's entries, used for ETags
+    revision = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=True)
+    movies = db.relationship('MovieInList', back_populates='list', lazy=True, cascade='all, delete-orphan',
+                             passive_deletes=True)
     
+    @staticmethod
+    def load_entries():
+        """Loader option that fetches all entries and the movie columns they serialize
+        in one extra query, instead of one query per entry and movie"""
+        return selectinload(MovieList.movies).joinedload(MovieInList.movie_ref).load_only(
+            Movie.imdb_id, Movie.title, Movie.poster, Movie.year
+        )
+
+    def touch(self):
+        """Record a change of the list, the caller commits"""
+        self.revision = MovieList.revision + 1
+        self.updated_at = datetime.utcnow()
+
+    @staticmethod
+    def touch_containing(movie_id):
+        """Record a change of every list containing the movie, the caller commits"""
+        MovieList.query.filter(MovieList.id.in_(
+            db.session.query(MovieInList.list_id).filter(MovieInList.movie_id == movie_id)
+        )).update({
+            MovieList.revision: MovieList.revision + 1,
+            MovieList.updated_at: datetime.utcnow()
+        }, synchronize_session=False)
+
+    def summary_dict(self, movie_count):
+        """The list without its entries"""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'is_default': self.is_default,
+            'revision': self.revision,
+            'created_at': self.created_at.isoformat(),
+            'movie_count': movie_count
+        }
+
     def to_dict(self):
         # Filter out entries with missing movies
         valid_movies = [movie.to_dict() for movie in self.movies if movie.movie_ref is not None]
@@ -16,6 +57,7 @@ class MovieList(db.Model):
             'id': self.id,
             'name': self.name,
             'is_default': self.is_default,
+            'revision': self.revision,
             'created_at': self.created_at.isoformat(),
             'movies': valid_movies
         }
@@ -23,5 +65,8 @@ class MovieList(db.Model):
     def delete_list(self):
         if self.is_default:
             raise ValueError('Cannot delete default lists')
+        from .tracked_movie import TrackedMovie
+        movie_ids = [entry.movie_id for entry in self.movies]
         db.session.delete(self)
+        TrackedMovie.refresh(movie_ids)
         db.session.commit()
\ No newline at end of file
@@ -0,0 +1,22 @@
+from datetime import datetime
+from . import db
+
+class OutboxEmail(db.Model):
+    """A queued email, sent by the background outbox sender (utils/mail_outbox.py)"""
+    __table_args__ = (
+        db.Index('ix_outbox_email_status_priority_next_attempt', 'status', 'priority', 'next_attempt_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(200), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True)
+    status = db.Column(db.String(10), nullable=False, default='pending')  # pending, sent or failed
+    # Higher goes first, so transactional mail (password resets) never waits behind digests
+    priority = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
@@ -0,0 +1,19 @@
+from datetime import datetime
+from . import db
+
+class ScrapeError(db.Model):
+    """Failures of one scrape run aggregated per category, written by all workers and processes"""
+    __table_args__ = (
+        db.UniqueConstraint('run_id', 'category', name='uq_scrape_error_run_category'),
+        db.Index('ix_scrape_error_reported_at', 'reported_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    run_id = db.Column(db.String(32), nullable=False)
+    category = db.Column(db.String(30), nullable=False)  # timeout, selector_missing, webdriver_crash, database, other
+    count = db.Column(db.Integer, nullable=False, default=0)
+    first_trace = db.Column(db.Text, nullable=True)
+    last_trace = db.Column(db.Text, nullable=True)
+    first_seen_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_seen_at = db.Column(db.DateTime, default=datetime.utcnow)
+    reported_at = db.Column(db.DateTime, nullable=True)
@@ -0,0 +1,139 @@
+from datetime import datetime, timedelta
+import os
+from . import db
+from .tracked_movie import TrackedMovie
+
+SCRAPE_RETRY_BASE = timedelta(minutes=int(os.getenv('SCRAPE_RETRY_BASE_MINUTES', 5)))
+
+class ScrapeItem(db.Model):
+    """Checkpoint of one movie in a scrape run, so an interrupted run can resume where it stopped.
+
+    The pending items of a run also form the work queue shared by all scrape
+    workers: a worker leases a few items at a time, and items whose lease ran
+    out (because their worker died) are handed out again.
+    """
+    __table_args__ = (
+        db.UniqueConstraint('run_id', 'movie_id', name='uq_scrape_item_run_movie'),
+        db.Index('ix_scrape_item_run_status_next_attempt', 'run_id', 'status', 'next_attempt_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    run_id = db.Column(db.String(32), db.ForeignKey('scrape_run.id', ondelete='CASCADE'), nullable=False)
+    movie_id = db.Column(db.Integer, db.ForeignKey('movie.id', ondelete='CASCADE'), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, done or failed
+    outcome = db.Column(db.String(20), nullable=True)  # changed, unchanged, not_found or failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    leased_by = db.Column(db.String(255), nullable=True)
+    leased_until = db.Column(db.DateTime, nullable=True)
+
+    @staticmethod
+    def add(run_id, movie_ids=None, now=None):
+        """Create pending items for the given movies, or for every tracked movie; the caller commits"""
+        now = now or datetime.utcnow()
+        table = ScrapeItem.__table__
+        selected = db.select(
+            db.literal(run_id), TrackedMovie.movie_id, db.literal('pending'), db.literal(0), db.literal(now)
+        ).distinct()
+        if movie_ids is not None:
+            selected = selected.where(TrackedMovie.movie_id.in_(movie_ids))
+        return db.session.execute(table.insert().from_select(
+            ['run_id', 'movie_id', 'status', 'attempts', 'next_attempt_at'], selected
+        )).rowcount
+
+    @staticmethod
+    def _leasable(run_id, now):
+        return db.and_(
+            ScrapeItem.run_id == run_id,
+            ScrapeItem.status == 'pending',
+            ScrapeItem.next_attempt_at <= now,
+            db.or_(ScrapeItem.leased_until.is_(None), ScrapeItem.leased_until < now)
+        )
+
+    @staticmethod
+    def lease(run_id, holder, limit, visibility, now=None):
+        """Claim up to limit due items of the run for holder and return their movie ids, the caller commits.
+
+        The claim is a single conditional UPDATE, so concurrent workers never
+        get the same item. Unless checkpointed, an item becomes leasable again
+        after visibility.
+        """
+        now = now or datetime.utcnow()
+        candidates = db.select(ScrapeItem.id).where(ScrapeItem._leasable(run_id, now)).order_by(
+            ScrapeItem.movie_id
+        ).limit(limit).scalar_subquery()
+        db.session.execute(db.update(ScrapeItem).where(
+            ScrapeItem.id.in_(candidates),
+            ScrapeItem._leasable(run_id, now)
+        ).values(leased_by=holder, leased_until=now + visibility).execution_options(synchronize_session=False))
+        rows = db.session.query(ScrapeItem.movie_id).filter(
+            ScrapeItem.run_id == run_id,
+            ScrapeItem.status == 'pending',
+            ScrapeItem.leased_by == holder,
+            ScrapeItem.leased_until == now + visibility
+        ).order_by(ScrapeItem.movie_id)
+        return [movie_id for (movie_id,) in rows]
+
+    @staticmethod
+    def renew(run_id, holder, visibility, now=None):
+        """Extend the leases holder still has on unfinished items, the caller commits.
+
+        Sent with the run's heartbeat, so items stay with a worker that is
+        alive but waiting (e.g. for the circuit breaker) longer than a lease.
+        """
+        now = now or datetime.utcnow()
+        return ScrapeItem.query.filter_by(run_id=run_id, status='pending', leased_by=holder).update(
+            {'leased_until': now + visibility}, synchronize_session=False
+        )
+
+    @staticmethod
+    def release(run_id, holder):
+        """Hand the unfinished items leased by holder back right away, the caller commits"""
+        ScrapeItem.query.filter_by(run_id=run_id, status='pending', leased_by=holder).update(
+            {'leased_by': None, 'leased_until': None}, synchronize_session=False
+        )
+
+    @staticmethod
+    def next_retry_at(run_id):
+        """When the next pending item becomes due or its lease runs out, None if nothing is pending"""
+        available_at = db.case(
+            (ScrapeItem.leased_until > ScrapeItem.next_attempt_at, ScrapeItem.leased_until),
+            else_=ScrapeItem.next_attempt_at
+        )
+        return db.session.query(db.func.min(available_at)).filter(
+            ScrapeItem.run_id == run_id,
+            ScrapeItem.status == 'pending'
+        ).scalar()
+
+    @staticmethod
+    def checkpoint(run_id, outcomes, max_attempts, now=None):
+        """Record the outcome of attempts, as part of the caller's transaction.
+
+        outcomes maps movie ids to changed, unchanged, not_found or failed.
+        Failed items are retried after an exponential backoff until
+        max_attempts is reached. Returns the outcome counts of the items that
+        are final now and the number of retries scheduled.
+        """
+        now = now or datetime.utcnow()
+        final = {}
+        retries = 0
+        items = ScrapeItem.query.filter(
+            ScrapeItem.run_id == run_id,
+            ScrapeItem.movie_id.in_(outcomes.keys()),
+            ScrapeItem.status == 'pending'
+        )
+        for item in items:
+            outcome = outcomes[item.movie_id]
+            item.attempts += 1
+            item.outcome = outcome
+            item.leased_by = None
+            item.leased_until = None
+            if outcome == 'failed' and item.attempts < max_attempts:
+                item.next_attempt_at = now + SCRAPE_RETRY_BASE * 2 ** (item.attempts - 1)
+                retries += 1
+                continue
+            item.status = 'failed' if outcome == 'failed' else 'done'
+            item.finished_at = now
+            final[outcome] = final.get(outcome, 0) + 1
+        return final, retries
@@ -0,0 +1,156 @@
+from datetime import datetime, timedelta
+import uuid
+from sqlalchemy.exc import IntegrityError
+from . import db
+from .scrape_item import ScrapeItem
+
+# A run whose workers have not reported for this long is assumed to have died with its process
+STALE_AFTER = timedelta(minutes=10)
+RETENTION = timedelta(days=90)
+
+OUTCOMES = ('changed', 'unchanged', 'not_found', 'failed')
+
+class ScrapeRun(db.Model):
+    """One scrape over a set of movies, with its progress.
+
+    active_lock is 1 while the run is active and NULL afterwards; its unique
+    constraint makes sure only one run is active across threads and processes.
+    The movies of a run are checkpointed as ScrapeItems, so a run that was
+    interrupted can be resumed.
+    """
+    __table_args__ = (
+        db.Index('ix_scrape_run_started_at', 'started_at'),
+    )
+
+    id = db.Column(db.String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
+    kind = db.Column(db.String(20), nullable=False)  # full or refresh
+    status = db.Column(db.String(20), nullable=False, default='running')  # running, finished, cancelled or failed
+    active_lock = db.Column(db.Integer, unique=True, nullable=True)
+    triggered_by_user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True)
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False)
+    started_at = db.Column(db.DateTime, default=datetime.utcnow)
+    heartbeat_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    total = db.Column(db.Integer, nullable=True)
+    processed = db.Column(db.Integer, nullable=False, default=0)
+    changed = db.Column(db.Integer, nullable=False, default=0)
+    unchanged = db.Column(db.Integer, nullable=False, default=0)
+    not_found = db.Column(db.Integer, nullable=False, default=0)
+    failed = db.Column(db.Integer, nullable=False, default=0)
+    retried = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    current_movie_id = db.Column(db.Integer, nullable=True)  # last movie written
+
+    @staticmethod
+    def start(kind, triggered_by_user_id=None):
+        """Create and commit a new active run, or return None if another one is active.
+
+        An active run whose process died is taken over and returned instead,
+        so it continues where it stopped; check the kind of the returned run.
+        """
+        now = datetime.utcnow()
+        stale = ScrapeRun.query.filter(
+            ScrapeRun.active_lock.isnot(None),
+            ScrapeRun.heartbeat_at < now - STALE_AFTER
+        ).first()
+        if stale is not None:
+            # Conditional update, only one process can win the takeover
+            claimed = ScrapeRun.query.filter(
+                ScrapeRun.id == stale.id,
+                ScrapeRun.heartbeat_at == stale.heartbeat_at
+            ).update({'heartbeat_at': now}, synchronize_session=False)
+            db.session.commit()
+            return db.session.get(ScrapeRun, stale.id) if claimed else None
+
+        ScrapeRun.query.filter(
+            ScrapeRun.active_lock.is_(None),
+            ScrapeRun.started_at < now - RETENTION
+        ).delete(synchronize_session=False)
+        run = ScrapeRun(kind=kind, active_lock=1, triggered_by_user_id=triggered_by_user_id)
+        db.session.add(run)
+        try:
+            db.session.commit()
+            return run
+        except IntegrityError:
+            db.session.rollback()
+            return None
+
+    @staticmethod
+    def resume(run_id):
+        """Make a cancelled or failed run active again, returns False if another run is active"""
+        run = db.session.get(ScrapeRun, run_id)
+        run.status = 'running'
+        run.active_lock = 1
+        run.cancel_requested = False
+        run.heartbeat_at = datetime.utcnow()
+        run.finished_at = None
+        try:
+            db.session.commit()
+            return True
+        except IntegrityError:
+            db.session.rollback()
+            return False
+
+    @staticmethod
+    def active():
+        return ScrapeRun.query.filter(ScrapeRun.active_lock.isnot(None)).first()
+
+    @staticmethod
+    def add_progress(run_id, outcomes, retries=0, position=None):
+        """Count finished movies by outcome and scheduled retries, part of the caller's transaction"""
+        values = {getattr(ScrapeRun, outcome): getattr(ScrapeRun, outcome) + count
+                  for outcome, count in outcomes.items() if count}
+        values[ScrapeRun.processed] = ScrapeRun.processed + sum(outcomes.values())
+        if retries:
+            values[ScrapeRun.retried] = ScrapeRun.retried + retries
+        values[ScrapeRun.heartbeat_at] = datetime.utcnow()
+        if position is not None:
+            values[ScrapeRun.current_movie_id] = position
+        ScrapeRun.query.filter_by(id=run_id).update(values, synchronize_session=False)
+
+    @staticmethod
+    def heartbeat(run_id):
+        """Mark the run as alive and return whether it should stop, the caller commits.
+
+        A run stops once it was cancelled or another worker already ended it.
+        """
+        ScrapeRun.query.filter_by(id=run_id).update({'heartbeat_at': datetime.utcnow()}, synchronize_session=False)
+        row = db.session.query(ScrapeRun.cancel_requested, ScrapeRun.active_lock).filter_by(id=run_id).first()
+        return row is None or row.cancel_requested or row.active_lock is None
+
+    @staticmethod
+    def finish(run_id, status='finished'):
+        """Release the lock, a run asked to stop ends as cancelled.
+
+        Checkpoints are only kept for runs that can still be resumed. Several
+        workers may share a run, the first one to finish it wins.
+        """
+        run = db.session.get(ScrapeRun, run_id)
+        if run is None or run.active_lock is None:
+            return
+        run.status = 'cancelled' if run.cancel_requested and status == 'finished' else status
+        run.active_lock = None
+        run.finished_at = datetime.utcnow()
+        if run.status == 'finished':
+            ScrapeItem.query.filter_by(run_id=run_id).delete(synchronize_session=False)
+        db.session.commit()
+
+    def to_dict(self):
+        end = self.finished_at or datetime.utcnow()
+        elapsed = (end - self.started_at).total_seconds() if self.started_at else 0
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'triggered_by_user_id': self.triggered_by_user_id,
+            'cancel_requested': self.cancel_requested,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'heartbeat_at': self.heartbeat_at.isoformat() if self.heartbeat_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'total': self.total,
+            'processed': self.processed,
+            'outcomes': {outcome: getattr(self, outcome) for outcome in OUTCOMES},
+            'retried': self.retried,
+            'current_movie_id': self.current_movie_id,
+            'movies_per_minute': round(self.processed * 60 / elapsed, 2) if elapsed > 0 else None
+        }
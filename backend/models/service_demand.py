@@ -0,0 +1,33 @@
+from . import db
+from .user_service import UserService
+
+class ServiceDemand(db.Model):
+    """How many users subscribe to a streaming service in a region, adjusted whenever subscriptions change"""
+    service = db.Column(db.String(50), primary_key=True)
+    region = db.Column(db.String(10), primary_key=True, default='DE', server_default='DE')
+    subscriber_count = db.Column(db.Integer, nullable=False, default=0)
+
+    @staticmethod
+    def adjust(old_services, new_services, region='DE'):
+        """Count a user's change of subscriptions within a region, the caller commits"""
+        old_services, new_services = set(old_services or ()), set(new_services or ())
+        changes = {service: 1 for service in new_services - old_services}
+        changes.update({service: -1 for service in old_services - new_services})
+        for service, delta in changes.items():
+            updated = ServiceDemand.query.filter_by(service=service, region=region).update(
+                {'subscriber_count': ServiceDemand.subscriber_count + delta}, synchronize_session=False
+            )
+            if not updated:
+                db.session.add(ServiceDemand(service=service, region=region, subscriber_count=max(delta, 0)))
+                db.session.flush()
+
+    @staticmethod
+    def rebuild():
+        """Recount all subscriptions, the caller commits"""
+        counts = db.session.query(
+            UserService.service, UserService.region, db.func.count(db.distinct(UserService.user_id))
+        ).group_by(UserService.service, UserService.region).all()
+        ServiceDemand.query.delete(synchronize_session=False)
+        db.session.add_all(
+            ServiceDemand(service=service, region=region, subscriber_count=count) for service, region, count in counts
+        )
@@ -1,16 +1,91 @@
 from datetime import datetime
 from . import db
+from .movie import Movie
+from .availability_interval import AvailabilityInterval
 
 class StreamingAvailability(db.Model):
+    __table_args__ = (
+        db.UniqueConstraint('movie_id', 'service', 'region', name='uq_streaming_availability_movie_service_region'),
+        db.Index('ix_streaming_availability_movie_region', 'movie_id', 'region'),
+        db.Index('ix_streaming_availability_service_region', 'service', 'region'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
-    movie_id = db.Column(db.String(20), nullable=False)  # IMDB ID
+    movie_id = db.Column(db.String(20), db.ForeignKey('movie.imdb_id', ondelete='CASCADE'), nullable=False)  # IMDB ID
     service = db.Column(db.String(50), nullable=False)  # e.g., 'Netflix', 'Disney+', etc.
     available_from = db.Column(db.DateTime, nullable=True)
     available_until = db.Column(db.DateTime, nullable=True)
     region = db.Column(db.String(10), nullable=False, default='DE')  # Country code
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    added_by_user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    added_by_user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True)  # NULL for scraped rows
+
+    movie = db.relationship('Movie', back_populates='availabilities', lazy=True)
+
+    @staticmethod
+    def sync(movie_id, services, region='DE', added_by_user_id=None):
+        """Make the stored services of a movie match the given ones.
+
+        Only services that appeared or disappeared are inserted or deleted, so
+        untouched rows keep their created_at and manually entered dates, and
+        only changes are written to the availability history. The caller
+        commits. Returns the change set of the movie.
+        """
+        current = {
+            service for (service,) in db.session.query(StreamingAvailability.service).filter_by(
+                movie_id=movie_id, region=region
+            )
+        }
+        wanted = set(services)
+        added = sorted(wanted - current)
+        removed = sorted(current - wanted)
+
+        if removed:
+            StreamingAvailability.query.filter(
+                StreamingAvailability.movie_id == movie_id,
+                StreamingAvailability.region == region,
+                StreamingAvailability.service.in_(removed)
+            ).delete(synchronize_session=False)
+        db.session.add_all([
+            StreamingAvailability(
+                movie_id=movie_id,
+                service=service,
+                region=region,
+                added_by_user_id=added_by_user_id
+            ) for service in added
+        ])
+        if added or removed:
+            AvailabilityInterval.record(movie_id, region, added, removed)
+            Movie.bump_availability_revision(movie_id)
+
+        return {'movie_id': movie_id, 'region': region, 'added': added, 'removed': removed}
+
+    @staticmethod
+    def for_movies(movie_ids, subscribed_services=(), region='DE', subscribed_only=False):
+        """Return {imdb_id: [availability dict, ...]} for many movies with one IN query.
+
+        Every entry is flagged with whether it is on one of subscribed_services,
+        those come first. Movies without availability map to an empty list.
+        """
+        subscribed_services = set(subscribed_services or ())
+        result = {movie_id: [] for movie_id in movie_ids}
+        if not result:
+            return result
+
+        query = StreamingAvailability.query.filter(
+            StreamingAvailability.movie_id.in_(result.keys()),
+            StreamingAvailability.region == region
+        )
+        if subscribed_only:
+            query = query.filter(StreamingAvailability.service.in_(subscribed_services))
+
+        for availability in query.order_by(StreamingAvailability.service):
+            entry = availability.to_dict()
+            entry['subscribed'] = availability.service in subscribed_services
+            result[availability.movie_id].append(entry)
+        for entries in result.values():
+            entries.sort(key=lambda entry: not entry['subscribed'])
+        return result
 
     def to_dict(self):
         return {
@@ -0,0 +1,36 @@
+from datetime import datetime
+from . import db
+
+class StreamingUrl(db.Model):
+    """Resolved werstreamt.es detail page of a movie in a region, a NULL url caches a "not found" result"""
+    __table_args__ = (
+        db.UniqueConstraint('imdb_id', 'region', name='uq_streaming_url_imdb_region'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    imdb_id = db.Column(db.String(20), nullable=False)  # IMDB ID
+    region = db.Column(db.String(10), nullable=False, default='DE', server_default='DE')
+    url = db.Column(db.String(500), nullable=True)
+    resolved_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    @staticmethod
+    def lookup(imdb_id, region='DE'):
+        """Return the cached entry for a movie unless it has expired"""
+        entry = StreamingUrl.query.filter_by(imdb_id=imdb_id, region=region).first()
+        if entry and entry.expires_at > datetime.utcnow():
+            return entry
+        return None
+
+    @staticmethod
+    def remember(imdb_id, url, ttl, region='DE'):
+        """Store (or replace) the resolved URL for a movie, the caller commits"""
+        entry = StreamingUrl.query.filter_by(imdb_id=imdb_id, region=region).first()
+        if not entry:
+            entry = StreamingUrl(imdb_id=imdb_id, region=region)
+            db.session.add(entry)
+        now = datetime.utcnow()
+        entry.url = url
+        entry.resolved_at = now
+        entry.expires_at = now + ttl
+        return entry
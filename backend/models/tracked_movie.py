@@ -0,0 +1,87 @@
+from datetime import datetime
+from . import db
+from .movie_in_list import MovieInList
+from .movie_list import MovieList
+from .user import User
+from .user_service import UserService
+
+class TrackedMovie(db.Model):
+    """A movie on at least one list of a user in a region, with how many of them watch it.
+
+    Kept up to date by the endpoints that change lists, subscriptions or
+    regions, so the scraper only visits (movie, region) pairs someone cares
+    about and "how many users watch this" is a primary key lookup.
+    """
+    movie_id = db.Column(db.Integer, db.ForeignKey('movie.id', ondelete='CASCADE'), primary_key=True)
+    region = db.Column(db.String(10), primary_key=True, default='DE', server_default='DE')
+    watcher_count = db.Column(db.Integer, nullable=False, default=0)
+    subscriber_count = db.Column(db.Integer, nullable=False, default=0)  # watchers with any subscription
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @staticmethod
+    def _counts(movie_ids=None):
+        """Return {(movie_id, region): (watcher_count, subscriber_count)} recounted from the lists"""
+        rows = db.session.query(MovieInList.movie_id, User.region, MovieList.user_id).join(
+            MovieList, MovieInList.list_id == MovieList.id
+        ).join(User, MovieList.user_id == User.id).distinct()
+        if movie_ids is not None:
+            rows = rows.filter(MovieInList.movie_id.in_(movie_ids))
+        watchers = {}
+        for movie_id, region, user_id in rows:
+            watchers.setdefault((movie_id, region), set()).add(user_id)
+
+        user_ids = set().union(*watchers.values()) if watchers else set()
+        subscribers = set(UserService.by_user(user_ids))
+        return {key: (len(users), len(users & subscribers)) for key, users in watchers.items()}
+
+    @staticmethod
+    def refresh(movie_ids):
+        """Recount the given movies after their list entries changed, the caller commits"""
+        movie_ids = set(movie_ids)
+        if not movie_ids:
+            return
+        db.session.flush()
+        counts = TrackedMovie._counts(movie_ids)
+        for tracked in TrackedMovie.query.filter(TrackedMovie.movie_id.in_(movie_ids)):
+            if (tracked.movie_id, tracked.region) not in counts:
+                db.session.delete(tracked)
+        for (movie_id, region), (watcher_count, subscriber_count) in counts.items():
+            db.session.merge(TrackedMovie(movie_id=movie_id, region=region, watcher_count=watcher_count,
+                                          subscriber_count=subscriber_count))
+
+    @staticmethod
+    def user_movie_ids(user_id):
+        """Ids of the movies on any list of a user"""
+        rows = db.session.query(MovieInList.movie_id).join(
+            MovieList, MovieInList.list_id == MovieList.id
+        ).filter(MovieList.user_id == user_id).distinct()
+        return [movie_id for (movie_id,) in rows]
+
+    @staticmethod
+    def rebuild():
+        """Recount every movie, returns the number of tracked movies; the caller commits"""
+        counts = TrackedMovie._counts()
+        TrackedMovie.query.delete(synchronize_session=False)
+        db.session.add_all(
+            TrackedMovie(movie_id=movie_id, region=region, watcher_count=watcher_count,
+                         subscriber_count=subscriber_count)
+            for (movie_id, region), (watcher_count, subscriber_count) in counts.items()
+        )
+        return len(counts)
+
+    @staticmethod
+    def counts(movie_ids):
+        """Return {movie_id: (watcher_count, subscriber_count)} over all regions, untracked movies count zero"""
+        counts = {
+            movie_id: (watcher_count, subscriber_count)
+            for movie_id, watcher_count, subscriber_count in db.session.query(
+                TrackedMovie.movie_id, db.func.sum(TrackedMovie.watcher_count), db.func.sum(TrackedMovie.subscriber_count)
+            ).filter(TrackedMovie.movie_id.in_(movie_ids)).group_by(TrackedMovie.movie_id)
+        }
+        return {movie_id: counts.get(movie_id, (0, 0)) for movie_id in movie_ids}
+
+    @staticmethod
+    def regions(movie_id):
+        """Regions in which someone tracks the movie"""
+        rows = db.session.query(TrackedMovie.region).filter_by(movie_id=movie_id).order_by(TrackedMovie.region)
+        return [region for (region,) in rows]
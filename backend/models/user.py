@@ -2,6 +2,7 @@ from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from . import db
 from .password_reset import PasswordReset
+from .user_service import UserService
 from datetime import datetime
 
 class User(UserMixin, db.Model):
@@ -11,9 +12,38 @@ class User(UserMixin, db.Model):
     password_hash = db.Column(db.String(128))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_admin = db.Column(db.Boolean, default=False)
-    streaming_services = db.Column(db.JSON, default=list)  # List of subscribed streaming services
+    region = db.Column(db.String(10), nullable=False, default='DE', server_default='DE')  # Country code
+    # Subscriptions used to be a JSON list here, it is only read to migrate them to UserService
+    legacy_streaming_services = db.Column('streaming_services', db.JSON, nullable=True)
+    services = db.relationship('UserService', lazy=True, cascade='all, delete-orphan', passive_deletes=True,
+                               order_by=UserService.id)
     movie_lists = db.relationship('MovieList', backref='user', lazy=True, cascade='all, delete-orphan')
-    reset_tokens = db.relationship('PasswordReset', backref='user', lazy=True)
+    reset_tokens = db.relationship('PasswordReset', backref='user', lazy=True, cascade='all, delete-orphan')
+
+    @property
+    def streaming_services(self):
+        """Names of the streaming services subscribed to in the user's region"""
+        return [subscription.service for subscription in self.services if subscription.region == self.region]
+
+    @streaming_services.setter
+    def streaming_services(self, services):
+        services = list(dict.fromkeys(services or ()))
+        for subscription in list(self.services):
+            if subscription.region != self.region or subscription.service not in services:
+                self.services.remove(subscription)
+        current = {subscription.service for subscription in self.services}
+        self.services.extend(
+            UserService(service=service, region=self.region) for service in services if service not in current
+        )
+
+    def move_to_region(self, region, offered_services):
+        """Change the user's region, keeping the subscriptions to services also offered there"""
+        for subscription in list(self.services):
+            if subscription.service in offered_services:
+                subscription.region = region
+            else:
+                self.services.remove(subscription)
+        self.region = region
 
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
@@ -38,5 +68,6 @@ class User(UserMixin, db.Model):
             'email': self.email,
             'created_at': self.created_at.isoformat(),
             'is_admin': self.is_admin,
-            'streaming_services': self.streaming_services or []
+            'region': self.region,
+            'streaming_services': self.streaming_services
         } 
\ No newline at end of file
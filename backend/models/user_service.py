@@ -0,0 +1,30 @@
+from . import db
+
+class UserService(db.Model):
+    """A streaming service a user subscribes to in a region"""
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'service', 'region', name='uq_user_service'),
+        db.Index('ix_user_service_service_region_user', 'service', 'region', 'user_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    service = db.Column(db.String(50), nullable=False)
+    region = db.Column(db.String(10), nullable=False, default='DE')
+
+    @staticmethod
+    def subscriber_ids(service, region='DE'):
+        """Ids of the users subscribing to a service"""
+        rows = db.session.query(UserService.user_id).filter_by(service=service, region=region)
+        return {user_id for (user_id,) in rows}
+
+    @staticmethod
+    def by_user(user_ids):
+        """Return {user_id: [service, ...]} for the given users, users without services are left out"""
+        index = {}
+        rows = db.session.query(UserService.user_id, UserService.service).filter(
+            UserService.user_id.in_(user_ids)
+        ).order_by(UserService.id)
+        for user_id, service in rows:
+            index.setdefault(user_id, []).append(service)
+        return index
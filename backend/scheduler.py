@@ -1,23 +1,173 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
-from scrapers.streaming_scraper import update_all_movies
+from apscheduler.triggers.interval import IntervalTrigger
+from scrapers.streaming_scraper import refresh_due_movies, join_active_run
+from utils.maintenance import cleanup_orphaned_entries, rebuild_tracked_movies
+from utils.movie_details import backfill_movie_details
+from utils.mail_outbox import drain_outbox
+from utils.availability_matcher import enqueue_digests
+from models import Lease
+import functools
 import logging
+import os
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def init_scheduler():
+REFRESH_INTERVAL_MINUTES = int(os.getenv('REFRESH_INTERVAL_MINUTES', 10))
+DIGEST_HOUR = int(os.getenv('DIGEST_HOUR', 8))
+# Every process runs a scheduler, but only the holder of this lease fires the jobs
+LEADER_LEASE = 'scheduler'
+LEADER_LEASE_SECONDS = int(os.getenv('SCHEDULER_LEASE_SECONDS', 60))
+JOIN_INTERVAL_SECONDS = int(os.getenv('SCRAPE_JOIN_INTERVAL_SECONDS', 30))
+
+_scheduler = None
+_is_leader = False
+
+def _elect(app):
+    """Take or renew the leader lease well before it runs out"""
+    global _is_leader
+    with app.app_context():
+        try:
+            leader = Lease.acquire(LEADER_LEASE, LEADER_LEASE_SECONDS)
+        except Exception as e:
+            logger.error(f"Could not renew the scheduler lease: {str(e)}")
+            leader = False
+    if leader != _is_leader:
+        logger.info("This process is now the scheduler leader" if leader else "This process is no longer the scheduler leader")
+    _is_leader = leader
+
+def _leader_only(job):
+    @functools.wraps(job)
+    def run(*args, **kwargs):
+        if _is_leader:
+            return job(*args, **kwargs)
+    return run
+
+def _add_join_job(scheduler, app):
+    # Help with the active scrape run, whichever process started it
+    scheduler.add_job(
+        join_active_run,
+        args=[app],
+        trigger=IntervalTrigger(seconds=JOIN_INTERVAL_SECONDS),
+        id='join_active_run',
+        name='Share the work of the active scrape run',
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True
+    )
+
+def init_scheduler(app, join_runs=False):
+    """Start the background jobs once per process.
+
+    Any number of processes (web servers or worker.py) may do this: the jobs
+    only fire in the process holding the leader lease. With join_runs the
+    process also helps with the active scrape run, which worker.py asks for
+    so that web processes never start a browser for another process's run.
+    """
+    global _scheduler
+    if _scheduler is not None:
+        # Already started on import of app, e.g. in worker.py
+        if join_runs and _scheduler.get_job('join_active_run') is None:
+            _add_join_job(_scheduler, app)
+        return _scheduler
     scheduler = BackgroundScheduler()
-    
-    # Schedule the update to run every day at 3 AM
+
+    _elect(app)
     scheduler.add_job(
-        update_all_movies,
-        trigger=CronTrigger(hour=3, minute=0),
-        id='update_streaming_availability',
-        name='Update streaming availability for all movies',
+        _elect,
+        args=[app],
+        trigger=IntervalTrigger(seconds=max(1, LEADER_LEASE_SECONDS // 3)),
+        id='elect_leader',
+        name='Renew the scheduler leader lease',
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True
+    )
+
+    if join_runs:
+        _add_join_job(scheduler, app)
+
+    # Continuously refresh the movies whose planned check is due, in small batches
+    scheduler.add_job(
+        _leader_only(refresh_due_movies),
+        args=[app],
+        trigger=IntervalTrigger(minutes=REFRESH_INTERVAL_MINUTES),
+        id='refresh_due_movies',
+        name='Refresh streaming availability of due movies',
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True
+    )
+
+    # Hydrate tracked movies with OMDb details so detail views never wait for OMDb
+    scheduler.add_job(
+        _leader_only(backfill_movie_details),
+        args=[app],
+        trigger=IntervalTrigger(hours=1),
+        id='backfill_movie_details',
+        name='Store OMDb details of tracked movies',
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True
+    )
+
+    # Send queued emails in the background
+    scheduler.add_job(
+        _leader_only(drain_outbox),
+        args=[app],
+        trigger=IntervalTrigger(minutes=1),
+        id='drain_outbox',
+        name='Send queued emails',
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True
+    )
+
+    # One mail per user with all movies that became available since the last one
+    scheduler.add_job(
+        _leader_only(enqueue_digests),
+        args=[app],
+        trigger=CronTrigger(hour=DIGEST_HOUR, minute=0),
+        id='enqueue_digests',
+        name='Queue daily availability digests',
+        replace_existing=True
+    )
+
+    # Database housekeeping, kept off the request path
+    scheduler.add_job(
+        _leader_only(cleanup_orphaned_entries),
+        args=[app],
+        trigger=CronTrigger(hour=4, minute=0),
+        id='cleanup_orphaned_entries',
+        name='Remove orphaned movie list entries',
+        replace_existing=True
+    )
+
+    # Repair drift in the incrementally maintained watcher counts
+    scheduler.add_job(
+        _leader_only(rebuild_tracked_movies),
+        args=[app],
+        trigger=CronTrigger(hour=4, minute=30),
+        id='rebuild_tracked_movies',
+        name='Recount movie watchers and service subscribers',
         replace_existing=True
     )
     
     scheduler.start()
-    logger.info("Scheduler started. Streaming availability will be updated daily at 3 AM.") 
\ No newline at end of file
+    _scheduler = scheduler
+    logger.info(f"Scheduler started. Due movies will be refreshed every {REFRESH_INTERVAL_MINUTES} minutes.")
+    return scheduler
+
+def shutdown_scheduler(app):
+    """Stop the jobs and hand the leadership to another process right away"""
+    global _scheduler, _is_leader
+    if _scheduler is None:
+        return
+    _scheduler.shutdown(wait=False)
+    _scheduler = None
+    if _is_leader:
+        with app.app_context():
+            Lease.release(LEADER_LEASE)
+        _is_leader = False
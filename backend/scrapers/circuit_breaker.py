@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+import logging
+
+from models import HostThrottle
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Stops the scraper workers of every process after a burst of structural failures.
+
+    After ``threshold`` failures in a row (blocked or captcha pages, server
+    errors, timeouts) the breaker opens for ``cooldown`` seconds and workers
+    take no new movies. Then a single probe is let through: if it succeeds the
+    breaker closes, otherwise it opens again for twice as long, up to
+    ``max_cooldown``. The state lives in the HostThrottle row of ``host``, so
+    all processes count into and obey the same breaker.
+    """
+
+    def __init__(self, threshold=5, cooldown=300, max_cooldown=3600, host='www.werstreamt.es'):
+        self.threshold = threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.host = host
+
+    def _state(self):
+        return HostThrottle.read(self.host) or {'opened_until': None, 'failures': 0, 'probing': False}
+
+    def allow(self):
+        """Whether a worker may start on the next movie"""
+        state = self._state()
+        if state['opened_until'] is None:
+            return True
+        if datetime.utcnow() < state['opened_until']:
+            return False
+
+        def probe(current):
+            # Only one worker of all processes gets to probe per cooldown
+            if current['opened_until'] != state['opened_until']:
+                return None
+            # Without an outcome of this probe, the next one may start after another cooldown
+            cooldown = current['cooldown'] or self.base_cooldown
+            return {'probing': True, 'opened_until': datetime.utcnow() + timedelta(seconds=cooldown)}
+
+        _, values = HostThrottle.update(self.host, probe)
+        if values:
+            logger.info("Circuit breaker half-open, probing the site")
+        return bool(values)
+
+    def remaining(self):
+        """Seconds until the next probe may start"""
+        opened_until = self._state()['opened_until']
+        if opened_until is None:
+            return 0
+        return max(0, (opened_until - datetime.utcnow()).total_seconds())
+
+    def record_success(self):
+        state = self._state()
+        if not state['failures'] and state['opened_until'] is None and not state['probing']:
+            return
+
+        HostThrottle.update(self.host, lambda current: {
+            'failures': 0, 'opened_until': None, 'probing': False, 'cooldown': None
+        })
+        if state['opened_until'] is not None:
+            logger.info("Circuit breaker closed, the site answers normally again")
+
+    def record_failure(self):
+        def count(state):
+            values = {'failures': state['failures'] + 1}
+            cooldown = state['cooldown'] or self.base_cooldown
+            if state['probing']:
+                cooldown = min(self.max_cooldown, cooldown * 2)
+                values['probing'] = False
+            elif state['opened_until'] is not None or values['failures'] < self.threshold:
+                return values
+            values.update(cooldown=cooldown, opened_until=datetime.utcnow() + timedelta(seconds=cooldown))
+            return values
+
+        _, values = HostThrottle.update(self.host, count)
+        if 'opened_until' in values:
+            logger.warning(f"Circuit breaker open after {values['failures']} failures in a row, "
+                           f"pausing scraping for {values['cooldown']} seconds")
@@ -0,0 +1,166 @@
+"""
+Aggregates scraper failures by category instead of mailing every single one.
+
+Workers record errors in memory and flush the counts into the ScrapeError
+table, so all workers and processes of a run add up into the same rows. When
+a run finishes one summary is queued in the mail outbox, at most once per
+SCRAPER_REPORT_INTERVAL_HOURS; errors of skipped runs go into the next one.
+"""
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from datetime import datetime, timedelta
+import os
+import uuid
+import logging
+import threading
+import requests
+
+from models import db, ScrapeError
+from utils.email_notifier import notifier
+from utils.mail_outbox import enqueue_email
+from scrapers.fetchers import MissingNodes, Blocked
+
+logger = logging.getLogger(__name__)
+
+SCRAPER_REPORT_INTERVAL = timedelta(hours=int(os.getenv('SCRAPER_REPORT_INTERVAL_HOURS', 24)))
+ERROR_RETENTION = timedelta(days=30)
+MAX_TRACE_LENGTH = 4000
+
+def categorize(error):
+    """Map an exception to the category it is counted under"""
+    if isinstance(error, (TimeoutException, requests.Timeout)):
+        return 'timeout'
+    if isinstance(error, Blocked):
+        return 'blocked'
+    if isinstance(error, MissingNodes):
+        return 'selector_missing'
+    if isinstance(error, WebDriverException):
+        return 'webdriver_crash'
+    if isinstance(error, SQLAlchemyError):
+        return 'database'
+    return 'other'
+
+
+class ErrorAggregator:
+    """Collects the failures of one scrape run, shared by all its workers"""
+
+    def __init__(self, run_id=None):
+        self.run_id = run_id or uuid.uuid4().hex
+        self._pending = {}  # category -> [count, first trace, last trace]
+        self._lock = threading.Lock()
+
+    def record(self, error, trace):
+        """Count an error, cheap enough to call from the scrape loop"""
+        category = categorize(error)
+        trace = trace[:MAX_TRACE_LENGTH]
+        with self._lock:
+            entry = self._pending.get(category)
+            if entry is None:
+                self._pending[category] = [1, trace, trace]
+            else:
+                entry[0] += 1
+                entry[2] = trace
+        return category
+
+    def flush(self):
+        """Add the counts recorded so far to the run's ScrapeError rows.
+
+        Writes on a connection of its own, so call it while the caller's
+        session holds no open write transaction.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+
+        for attempt in range(2):
+            try:
+                self._write(pending)
+                return
+            except IntegrityError:
+                # Another process inserted the same row first, the retry updates it
+                if attempt:
+                    raise
+            except SQLAlchemyError as e:
+                logger.error(f"Could not store scraper errors: {str(e)}")
+                with self._lock:
+                    for category, (count, first_trace, last_trace) in pending.items():
+                        entry = self._pending.setdefault(category, [0, first_trace, last_trace])
+                        entry[0] += count
+                        entry[1] = first_trace
+                return
+
+    def _write(self, pending):
+        table = ScrapeError.__table__
+        now = datetime.utcnow()
+        with db.engine.begin() as conn:
+            for category, (count, first_trace, last_trace) in pending.items():
+                updated = conn.execute(table.update().where(
+                    table.c.run_id == self.run_id,
+                    table.c.category == category
+                ).values(count=table.c.count + count, last_trace=last_trace, last_seen_at=now)).rowcount
+                if not updated:
+                    conn.execute(table.insert().values(
+                        run_id=self.run_id, category=category, count=count,
+                        first_trace=first_trace, last_trace=last_trace,
+                        first_seen_at=now, last_seen_at=now
+                    ))
+
+    def finish(self, app):
+        """Store the remaining counts and queue the summary report"""
+        with app.app_context():
+            self.flush()
+            report_errors()
+
+def summary_body(errors):
+    sections = []
+    for error in errors:
+        sections.append(
+            f"{error.category}: {error.count} times in run {error.run_id} "
+            f"({error.first_seen_at:%Y-%m-%d %H:%M} - {error.last_seen_at:%Y-%m-%d %H:%M})\n\n"
+            f"First occurrence:\n{error.first_trace}\n"
+            + (f"\nLast occurrence:\n{error.last_trace}\n" if error.count > 1 else '')
+        )
+    totals = {}
+    for error in errors:
+        totals[error.category] = totals.get(error.category, 0) + error.count
+    overview = "\n".join(f"- {category}: {count}" for category, count in sorted(totals.items()))
+    return f"""The streaming availability scraper has encountered errors.
+Selector errors might indicate that the website structure has changed.
+
+{overview}
+
+""" + "\n\n".join(sections)
+
+def report_errors(now=None):
+    """Queue one summary mail covering all errors not reported yet, returns True if one was queued"""
+    now = now or datetime.utcnow()
+    try:
+        ScrapeError.query.filter(ScrapeError.reported_at < now - ERROR_RETENTION).delete(synchronize_session=False)
+        errors = ScrapeError.query.filter(ScrapeError.reported_at.is_(None)).order_by(
+            ScrapeError.first_seen_at, ScrapeError.category
+        ).all()
+        last_report = db.session.query(db.func.max(ScrapeError.reported_at)).scalar()
+
+        if not errors or (last_report and now - last_report < SCRAPER_REPORT_INTERVAL):
+            db.session.commit()
+            return False
+        if not notifier.notification_email:
+            logger.warning("NOTIFICATION_EMAIL is not set, scraper errors are not reported")
+            db.session.commit()
+            return False
+
+        enqueue_email(
+            subject="WatchCall: Streaming Scraper Failure",
+            recipient=notifier.notification_email,
+            body=summary_body(errors)
+        )
+        for error in errors:
+            error.reported_at = now
+        db.session.commit()
+        logger.info(f"Queued scraper error report covering {sum(error.count for error in errors)} errors")
+        return True
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Could not queue scraper error report: {str(e)}")
+        return False
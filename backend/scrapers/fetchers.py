@@ -0,0 +1,230 @@
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup
+from urllib.parse import urljoin
+import os
+import time
+import logging
+import shutil
+import requests
+import chromedriver_autoinstaller
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+logger = logging.getLogger(__name__)
+
+SEARCH_RESULT_SELECTOR = 'a.title'
+PROVIDER_SELECTOR = '.provider-item'
+SUBSCRIPTION_PROVIDER_SELECTOR = f'.subscription {PROVIDER_SELECTOR}'
+# Notice a detail page shows instead of providers when a movie has no offers at all
+NO_OFFERS_SELECTOR = os.getenv('SCRAPER_NO_OFFERS_SELECTOR', '.no-offers')
+# Present once the (client-side rendered) offers of a detail page are there, with or without providers
+OFFERS_RENDERED_SELECTOR = f'{PROVIDER_SELECTOR}, {NO_OFFERS_SELECTOR}'
+
+HTTP_TIMEOUT = float(os.getenv('SCRAPER_HTTP_TIMEOUT', 10))
+# Bounds for waiting on a rendered element, the actual wait follows the site's latency
+WAIT_TIMEOUT = float(os.getenv('SCRAPER_WAIT_SECONDS', 10))
+MIN_WAIT_TIMEOUT = float(os.getenv('SCRAPER_MIN_WAIT_SECONDS', 2))
+BLOCKED_STATUS_CODES = (403, 429, 503)
+BLOCKED_MARKERS = ('captcha', 'cf-challenge', 'challenge-platform', 'access denied')
+HTTP_USER_AGENT = os.getenv(
+    'SCRAPER_USER_AGENT',
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0 Safari/537.36'
+)
+
+
+class MissingNodes(Exception):
+    """The page did not contain the nodes the parser expects."""
+
+
+class PageNotFound(Exception):
+    """The server answered with 404 Not Found."""
+
+
+class Blocked(Exception):
+    """The site refused the request or answered with a captcha page."""
+
+    def __init__(self, url, retry_after=None):
+        super().__init__(url)
+        self.retry_after = retry_after
+
+
+def _looks_blocked(html):
+    html = html.lower()
+    return any(marker in html for marker in BLOCKED_MARKERS)
+
+def _retry_after(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class HttpFetcher:
+    """Fetches pages with a pooled requests.Session and parses the static HTML.
+
+    Cheap enough to run for every page; raises MissingNodes when the content
+    is rendered client-side so the caller can fall back to a browser.
+    """
+
+    name = 'http'
+
+    def __init__(self, rate_limiter=None, timeout=HTTP_TIMEOUT):
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = HTTP_USER_AGENT
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _record(self, url, latency, ok):
+        if self.rate_limiter:
+            self.rate_limiter.record(url, latency, ok)
+
+    def _get(self, url):
+        if self.rate_limiter:
+            self.rate_limiter.acquire(url)
+        started = time.monotonic()
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+        except requests.RequestException:
+            self._record(url, time.monotonic() - started, ok=False)
+            raise
+        latency = time.monotonic() - started
+
+        if response.status_code in BLOCKED_STATUS_CODES:
+            self._record(url, latency, ok=False)
+            retry_after = _retry_after(response.headers.get('Retry-After'))
+            if retry_after and self.rate_limiter:
+                self.rate_limiter.pause(url, retry_after)
+            raise Blocked(url, retry_after)
+        self._record(url, latency, ok=response.status_code < 500)
+        if response.status_code == 404:
+            raise PageNotFound(url)
+        response.raise_for_status()
+        return BeautifulSoup(response.text, HTML_PARSER)
+
+    def _missing(self, soup, url, selector):
+        if _looks_blocked(soup.get_text(' ')):
+            raise Blocked(url)
+        return MissingNodes(selector)
+
+    def search(self, url):
+        soup = self._get(url)
+        link = soup.select_one(f'{SEARCH_RESULT_SELECTOR}[href]')
+        if link is None:
+            raise self._missing(soup, url, SEARCH_RESULT_SELECTOR)
+        return urljoin(url, link['href'])
+
+    def subscription_services(self, url):
+        soup = self._get(url)
+        if soup.select_one(OFFERS_RENDERED_SELECTOR) is None:
+            raise self._missing(soup, url, OFFERS_RENDERED_SELECTOR)
+        return [item['title'] for item in soup.select(SUBSCRIPTION_PROVIDER_SELECTOR) if item.get('title')]
+
+    def close(self):
+        self.session.close()
+
+
+class SeleniumFetcher:
+    """Renders pages in a headless Chromium, started on first use."""
+
+    name = 'selenium'
+
+    def __init__(self, rate_limiter=None, max_pages=None):
+        self.rate_limiter = rate_limiter
+        self.max_pages = max_pages
+        self.pages_loaded = 0
+        self.crashed = False
+        self.driver = None
+
+    def _start(self):
+        # Install ChromeDriver if necessary
+        chromedriver_autoinstaller.install()
+
+        chrome_options = Options()
+        chrome_options.add_argument('--headless')
+        chrome_options.add_argument('--no-sandbox')
+        chrome_options.add_argument('--disable-dev-shm-usage')
+        chrome_options.add_argument('--disable-gpu')
+
+        # Find chromium-browser executable
+        chromium_path = shutil.which('chromium-browser')
+        if not chromium_path:
+            raise Exception("Chromium browser not found")
+
+        logger.info(f"Using Chromium at: {chromium_path}")
+        chrome_options.binary_location = chromium_path
+
+        logger.info("Setting up Chromium WebDriver...")
+        self.driver = webdriver.Chrome(options=chrome_options)
+
+    @property
+    def needs_recycle(self):
+        """Whether the WebDriver should be replaced before the next page"""
+        return self.crashed or bool(self.max_pages and self.pages_loaded >= self.max_pages)
+
+    def _get(self, url):
+        if self.driver is None:
+            try:
+                self._start()
+            except Exception:
+                self.crashed = True
+                raise
+        if self.rate_limiter:
+            self.rate_limiter.acquire(url)
+        self.pages_loaded += 1
+        started = time.monotonic()
+        try:
+            self.driver.get(url)
+        except WebDriverException:
+            self.crashed = True
+            if self.rate_limiter:
+                self.rate_limiter.record(url, time.monotonic() - started, ok=False)
+            raise
+        if self.rate_limiter:
+            self.rate_limiter.record(url, time.monotonic() - started)
+
+    def _wait_for(self, url, selector):
+        timeout = WAIT_TIMEOUT
+        if self.rate_limiter:
+            timeout = self.rate_limiter.wait_timeout(url, MIN_WAIT_TIMEOUT, WAIT_TIMEOUT)
+        try:
+            return WebDriverWait(self.driver, timeout).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, selector))
+            )
+        except TimeoutException:
+            if _looks_blocked(self.driver.page_source):
+                if self.rate_limiter:
+                    self.rate_limiter.record(url, timeout, ok=False)
+                raise Blocked(url)
+            raise MissingNodes(selector)
+
+    def search(self, url):
+        self._get(url)
+        return self._wait_for(url, SEARCH_RESULT_SELECTOR).get_attribute('href')
+
+    def subscription_services(self, url):
+        self._get(url)
+        self._wait_for(url, OFFERS_RENDERED_SELECTOR)
+        services = self.driver.find_elements(By.CSS_SELECTOR, SUBSCRIPTION_PROVIDER_SELECTOR)
+        return [name for name in (service.get_attribute('title') for service in services) if name]
+
+    def close(self):
+        driver, self.driver = self.driver, None
+        if driver is not None:
+            try:
+                driver.quit()
+                logger.info("Chromium WebDriver closed successfully")
+            except Exception as e:
+                logger.error(f"Error closing Chromium WebDriver: {str(e)}")
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+import logging
+import time
+
+from models import HostThrottle
+
+logger = logging.getLogger(__name__)
+
+
+class HostRateLimiter:
+    """Adaptive politeness budget shared by all scraper workers of every process.
+
+    Every host gets one request rate that starts at ``requests_per_second``,
+    no matter how many workers and processes are running: requests take
+    turns through the next free slot stored in the host's HostThrottle row.
+    Fast, successful responses raise the rate step by step up to
+    ``max_rate``; errors and slow responses halve it down to ``min_rate``
+    (additive increase, multiplicative decrease).
+    """
+
+    def __init__(self, requests_per_second, max_rate=None, min_rate=None, target_latency=3.0):
+        self.initial_rate = requests_per_second
+        self.max_rate = max_rate or requests_per_second * 2
+        self.min_rate = min_rate or requests_per_second / 10
+        self.target_latency = target_latency
+
+    def _rate(self, state):
+        return state['rate'] or self.initial_rate
+
+    def acquire(self, url):
+        """Block until a request to the host of ``url`` may be sent."""
+        if self.initial_rate <= 0:
+            return
+
+        def claim(state):
+            now = datetime.utcnow()
+            slot = max(now, state['next_slot_at'] or now, state['paused_until'] or now)
+            return {'next_slot_at': slot + timedelta(seconds=1 / self._rate(state))}
+
+        state, values = HostThrottle.update(urlparse(url).netloc, claim)
+        slot = values['next_slot_at'] - timedelta(seconds=1 / self._rate(state))
+        delay = (slot - datetime.utcnow()).total_seconds()
+        if delay > 0:
+            time.sleep(delay)
+
+    def record(self, url, latency, ok=True):
+        """Adapt the rate of the host to how a request to it went."""
+        if self.initial_rate <= 0:
+            return
+
+        def adapt(state):
+            rate = self._rate(state)
+            average = latency if state['latency'] is None else 0.8 * state['latency'] + 0.2 * latency
+            if ok and latency <= self.target_latency:
+                rate = min(self.max_rate, rate + self.initial_rate / 10)
+            else:
+                rate = max(self.min_rate, rate / 2)
+            return {'rate': rate, 'latency': average}
+
+        host = urlparse(url).netloc
+        state, values = HostThrottle.update(host, adapt)
+        if values['rate'] < self._rate(state):
+            logger.info(f"Slowing down requests to {host} to {values['rate']:.2f}/s "
+                        f"({'error' if not ok else f'{latency:.1f}s latency'})")
+
+    def pause(self, url, seconds):
+        """Send no request to the host of ``url`` for ``seconds``, e.g. after a 429 with Retry-After."""
+        def extend(state):
+            until = datetime.utcnow() + timedelta(seconds=seconds)
+            if state['paused_until'] is None or state['paused_until'] < until:
+                return {'paused_until': until}
+
+        HostThrottle.update(urlparse(url).netloc, extend)
+
+    def wait_timeout(self, url, minimum, maximum):
+        """How long to wait for a page element, scaled to the observed latency of the host."""
+        state = HostThrottle.read(urlparse(url).netloc)
+        if state is None or state['latency'] is None:
+            return maximum
+        return max(minimum, min(maximum, state['latency'] * 4))
@@ -0,0 +1,78 @@
+"""
+Decides when each movie's streaming availability should be checked again.
+
+Movies that many users track, and whose watchers actually subscribe to a
+streaming service, are checked several times a day. Movies nobody tracks, or
+whose availability has not changed for months, are checked rarely.
+"""
+from datetime import datetime, timedelta
+import math
+import os
+
+from models import db, Movie, StreamingAvailability, TrackedMovie
+
+BASE_INTERVAL = timedelta(hours=24)
+MIN_INTERVAL = timedelta(hours=2)
+NO_SUBSCRIBER_INTERVAL = timedelta(days=7)
+UNTRACKED_INTERVAL = timedelta(days=30)
+RETRY_INTERVAL = timedelta(hours=1)
+RECENT_CHANGE_WINDOW = timedelta(days=14)
+STABLE_AFTER = timedelta(days=90)
+
+REFRESH_BATCH_SIZE = int(os.getenv('REFRESH_BATCH_SIZE', 50))
+
+def movie_demand(movie_ids):
+    """Return {movie_id: (watcher_count, any_watcher_subscribes)} for the given movies"""
+    return {
+        movie_id: (watcher_count, subscriber_count > 0)
+        for movie_id, (watcher_count, subscriber_count) in TrackedMovie.counts(movie_ids).items()
+    }
+
+def next_expiry(imdb_id, now):
+    """Earliest known available_until of a movie that still lies in the future"""
+    return db.session.query(db.func.min(StreamingAvailability.available_until)).filter(
+        StreamingAvailability.movie_id == imdb_id,
+        StreamingAvailability.available_until > now
+    ).scalar()
+
+def check_interval(watcher_count, any_watcher_subscribes, availability_changed_at, now):
+    """How long to wait before checking a movie again"""
+    if watcher_count == 0:
+        return UNTRACKED_INTERVAL
+    if not any_watcher_subscribes:
+        return NO_SUBSCRIBER_INTERVAL
+
+    # Every doubling of the audience shortens the interval by another base step
+    interval = BASE_INTERVAL / (1 + math.log2(watcher_count))
+    if availability_changed_at and now - availability_changed_at < RECENT_CHANGE_WINDOW:
+        interval /= 2
+    elif not availability_changed_at or now - availability_changed_at > STABLE_AFTER:
+        interval *= 2
+    return max(MIN_INTERVAL, min(interval, NO_SUBSCRIBER_INTERVAL))
+
+def schedule_next_check(movie, now=None):
+    """Set movie.next_check_at based on its demand and availability history"""
+    now = now or datetime.utcnow()
+    watcher_count, any_watcher_subscribes = movie_demand([movie.id])[movie.id]
+    next_check = now + check_interval(watcher_count, any_watcher_subscribes, movie.availability_changed_at, now)
+
+    # Look again right after a known expiry instead of waiting for the next regular check
+    expiry = next_expiry(movie.imdb_id, now)
+    if expiry and watcher_count:
+        next_check = min(next_check, expiry + timedelta(minutes=5))
+
+    movie.next_check_at = next_check
+    return next_check
+
+def defer_check(movie, now=None):
+    """Push a failed check back a little so it is retried later without hammering the site"""
+    movie.next_check_at = (now or datetime.utcnow()) + RETRY_INTERVAL
+
+def due_movie_ids(limit=REFRESH_BATCH_SIZE, now=None):
+    """Ids of the tracked movies whose next check is due, most overdue (or never checked) first"""
+    now = now or datetime.utcnow()
+    tracked = db.session.query(TrackedMovie.movie_id).filter(TrackedMovie.movie_id == Movie.id).exists()
+    rows = db.session.query(Movie.id).filter(
+        tracked, db.or_(Movie.next_check_at.is_(None), Movie.next_check_at <= now)
+    ).order_by(Movie.next_check_at.is_(None).desc(), Movie.next_check_at.asc()).limit(limit)
+    return [movie_id for (movie_id,) in rows]
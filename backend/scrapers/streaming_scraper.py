@@ -1,224 +1,403 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
-from datetime import datetime
+from selenium.common.exceptions import WebDriverException
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+import os
 import time
 import logging
+import threading
 import traceback
-import shutil
-import chromedriver_autoinstaller
+from flask import current_app
 
-from models import db, Movie, StreamingAvailability
-from utils.email_notifier import notifier
+from models import db, Movie, StreamingAvailability, StreamingUrl, ScrapeRun, ScrapeItem, TrackedMovie
+from models.lease import instance_id
+from utils.availability_matcher import process_availability_changes
+from utils.regions import DEFAULT_REGION, site_for
+from scrapers.fetchers import HttpFetcher, SeleniumFetcher, MissingNodes, PageNotFound, Blocked
+from scrapers.rate_limiter import HostRateLimiter
+from scrapers.circuit_breaker import CircuitBreaker
+from scrapers.error_report import ErrorAggregator
+from scrapers.refresh_planner import schedule_next_check, defer_check, due_movie_ids, REFRESH_BATCH_SIZE
+from scrapers.worker_pool import ScraperPool, HEARTBEAT_INTERVAL
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class StreamingScraper:
+SCRAPER_WORKERS = int(os.getenv('SCRAPER_WORKERS', 2))
+# Starting rate, it adapts between the min and max to the site's latency and errors
+SCRAPER_REQUESTS_PER_SECOND = float(os.getenv('SCRAPER_REQUESTS_PER_SECOND', 0.5))
+SCRAPER_MIN_REQUESTS_PER_SECOND = float(os.getenv('SCRAPER_MIN_REQUESTS_PER_SECOND', SCRAPER_REQUESTS_PER_SECOND / 10))
+SCRAPER_MAX_REQUESTS_PER_SECOND = float(os.getenv('SCRAPER_MAX_REQUESTS_PER_SECOND', SCRAPER_REQUESTS_PER_SECOND * 2))
+SCRAPER_TARGET_LATENCY = float(os.getenv('SCRAPER_TARGET_LATENCY_SECONDS', 3))
+# Failures in a row that pause every worker, and for how long at first
+SCRAPER_BREAKER_THRESHOLD = int(os.getenv('SCRAPER_BREAKER_THRESHOLD', 5))
+SCRAPER_BREAKER_COOLDOWN = int(os.getenv('SCRAPER_BREAKER_COOLDOWN_SECONDS', 300))
+SCRAPER_MAX_PAGES_PER_DRIVER = int(os.getenv('SCRAPER_MAX_PAGES_PER_DRIVER', 200))
+# Number of movies a worker writes per database transaction
+SCRAPER_COMMIT_BATCH = int(os.getenv('SCRAPER_COMMIT_BATCH', 25))
+# 'http' parses static HTML and only falls back to Chromium per page, 'selenium' always renders
+SCRAPER_BACKEND = os.getenv('SCRAPER_BACKEND', 'http')
+# How long resolved detail URLs and "not found" results are trusted before searching again
+SCRAPER_URL_TTL = timedelta(days=int(os.getenv('SCRAPER_URL_TTL_DAYS', 90)))
+SCRAPER_NOT_FOUND_TTL = timedelta(days=int(os.getenv('SCRAPER_NOT_FOUND_TTL_DAYS', 7)))
+# Attempts per movie within a full run, failures are retried with exponential backoff in later passes
+SCRAPER_MAX_ATTEMPTS = int(os.getenv('SCRAPER_MAX_ATTEMPTS', 3))
+# Workers of every process lease a run's movies in small batches; the movies of a worker
+# that died are handed out again once their lease timed out
+SCRAPE_LEASE_SIZE = int(os.getenv('SCRAPE_LEASE_SIZE', 20))
+SCRAPE_LEASE_TIMEOUT = timedelta(seconds=int(os.getenv('SCRAPE_LEASE_SECONDS', 900)))
+
+# Their state is kept per host in the database, so the politeness budget and the
+# breaker hold across the workers of all processes joining a run
+rate_limiter = HostRateLimiter(SCRAPER_REQUESTS_PER_SECOND, max_rate=SCRAPER_MAX_REQUESTS_PER_SECOND,
+                               min_rate=SCRAPER_MIN_REQUESTS_PER_SECOND, target_latency=SCRAPER_TARGET_LATENCY)
+circuit_breaker = CircuitBreaker(SCRAPER_BREAKER_THRESHOLD, SCRAPER_BREAKER_COOLDOWN,
+                                 host=urlparse(site_for(DEFAULT_REGION)).netloc)
+
+# Runs this process is working on, so it never joins one of them twice
+_local_runs = set()
+_local_runs_lock = threading.Lock()
+
+class ScrapeResult:
+    """What checking one movie in its tracked regions found, written to the database later by apply_result"""
+
     def __init__(self):
-        logger.info("Initializing StreamingScraper...")
-        try:
-            # Install ChromeDriver if necessary
-            chromedriver_autoinstaller.install()
-            
-            chrome_options = Options()
-            chrome_options.add_argument('--headless')
-            chrome_options.add_argument('--no-sandbox')
-            chrome_options.add_argument('--disable-dev-shm-usage')
-            chrome_options.add_argument('--disable-gpu')
-            
-            # Find chromium-browser executable
-            chromium_path = shutil.which('chromium-browser')
-            if not chromium_path:
-                raise Exception("Chromium browser not found")
-            
-            logger.info(f"Using Chromium at: {chromium_path}")
-            chrome_options.binary_location = chromium_path
-            
-            logger.info("Setting up Chromium WebDriver...")
-            self.driver = webdriver.Chrome(options=chrome_options)
-            self.wait = WebDriverWait(self.driver, 10)
-            self.structure_error_reported = False
-            logger.info("StreamingScraper initialized successfully")
-        except Exception as e:
-            error_msg = f"Failed to initialize StreamingScraper: {str(e)}\n{traceback.format_exc()}"
-            logger.error(error_msg)
-            notifier.send_scraping_failure_notification(error_msg)
-            raise
+        self.services = {}  # region -> service names, None if the movie is not on that region's site
+        self.failed = False
+        self.urls = {}  # region -> detail URL looked up again, None if the search found nothing
+        self.outcome = None  # changed, unchanged, not_found or failed once applied
+
+class StreamingScraper:
+    def __init__(self, rate_limiter=None, max_pages=SCRAPER_MAX_PAGES_PER_DRIVER, backend=SCRAPER_BACKEND, errors=None,
+                 breaker=None):
+        logger.info(f"Initializing StreamingScraper ({backend} backend)...")
+        self.breaker = breaker
+        self.selenium = SeleniumFetcher(rate_limiter=rate_limiter, max_pages=max_pages)
+        self.fetchers = [self.selenium]
+        if backend == 'http':
+            self.fetchers.insert(0, HttpFetcher(rate_limiter=rate_limiter))
+        self.errors = errors
 
     def __del__(self):
-        if hasattr(self, 'driver'):
+        self.close()
+
+    def close(self):
+        for fetcher in getattr(self, 'fetchers', []):
+            fetcher.close()
+
+    @property
+    def pages_loaded(self):
+        return self.selenium.pages_loaded
+
+    @property
+    def crashed(self):
+        return self.selenium.crashed
+
+    @property
+    def needs_recycle(self):
+        """Whether the WebDriver should be replaced before the next page"""
+        return self.selenium.needs_recycle
+
+    def _fetch(self, method, url):
+        """Try each backend in turn until one finds the expected nodes on the page.
+
+        Raises MissingNodes if none of them does, and Blocked right away if
+        the site refuses the request. Structural failures are counted by the
+        circuit breaker.
+        """
+        for fetcher in self.fetchers:
             try:
-                self.driver.quit()
-                logger.info("Chromium WebDriver closed successfully")
+                result = getattr(fetcher, method)(url)
+            except MissingNodes as e:
+                if fetcher is self.fetchers[-1]:
+                    # Every rendered detail page lists providers or says there are no offers,
+                    # a page with neither means the site changed
+                    if method == 'subscription_services':
+                        self._record_failure()
+                    raise
+                logger.info(f"{fetcher.name} backend found no '{e}' on {url}, falling back")
+            except PageNotFound:
+                self._record_success()
+                raise
+            except Blocked:
+                self._record_failure()
+                raise
+            except WebDriverException:
+                self.selenium.crashed = True
+                self._record_failure()
+                raise
             except Exception as e:
-                logger.error(f"Error closing Chromium WebDriver: {str(e)}")
+                if fetcher is self.fetchers[-1]:
+                    self._record_failure()
+                    raise
+                logger.warning(f"{fetcher.name} backend failed on {url}: {str(e)}, falling back")
+            else:
+                self._record_success()
+                return result
+
+    def _record_success(self):
+        if self.breaker:
+            self.breaker.record_success()
+
+    def _record_failure(self):
+        if self.breaker:
+            self.breaker.record_failure()
 
-    def search_movie(self, title, year=None):
+    def _report_error(self, error, error_msg):
+        logger.error(error_msg)
+        if self.errors:
+            self.errors.record(error, error_msg)
+
+    def _search(self, title, year=None, region=DEFAULT_REGION):
+        """Return the detail URL of the first search result, or None if there is none"""
+        # Format the search URL
+        search_query = f"{title} {year if year else ''}".strip()
+        search_url = f"{site_for(region)}/filme/?q={search_query}"
+
+        logger.info(f"Searching for movie: {search_query}")
         try:
-            # Format the search URL
-            search_query = f"{title} {year if year else ''}".strip()
-            search_url = f"https://www.werstreamt.es/filme/?q={search_query}"
-            
-            logger.info(f"Searching for movie: {search_query}")
-            self.driver.get(search_url)
-            time.sleep(2)  # Wait for page to load
-
-            # Find the first movie result
-            try:
-                movie_link = self.wait.until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, 'a.title'))
-                )
-                movie_url = movie_link.get_attribute('href')
-                logger.info(f"Found movie URL: {movie_url}")
-                return movie_url
-            except TimeoutException:
-                logger.warning(f"No results found for {search_query}")
-                return None
-
-        except WebDriverException as e:
-            error_msg = f"WebDriver error searching for movie {title}: {str(e)}\n{traceback.format_exc()}"
-            logger.error(error_msg)
-            if not self.structure_error_reported:
-                notifier.send_scraping_failure_notification(error_msg)
-                self.structure_error_reported = True
+            movie_url = self._fetch('search', search_url)
+        except MissingNodes:
+            logger.warning(f"No results found for {search_query}")
             return None
-        except Exception as e:
-            error_msg = f"Error searching for movie {title}: {str(e)}\n{traceback.format_exc()}"
-            logger.error(error_msg)
-            if not self.structure_error_reported:
-                notifier.send_scraping_failure_notification(error_msg)
-                self.structure_error_reported = True
+
+        logger.info(f"Found movie URL: {movie_url}")
+        return movie_url
+
+    def _subscription_services(self, movie_url):
+        """Return the subscription services listed on a detail page.
+
+        Raises PageNotFound or MissingNodes if the page is gone or no longer
+        looks like a detail page.
+        """
+        logger.info(f"Getting streaming services from: {movie_url}")
+        names = self._fetch('subscription_services', movie_url)
+        logger.info(f"Found streaming services: {names}")
+        return [{'service': name, 'type': 'subscription'} for name in names]
+
+    def _resolve_streaming_services(self, movie, result, region=DEFAULT_REGION):
+        """Scrape the services of a movie in a region, using the cached detail URL when possible.
+
+        Returns None if the movie cannot be found on the region's site. A fresh
+        search result is stored on result, to be remembered when it is applied.
+        """
+        cached = StreamingUrl.lookup(movie.imdb_id, region)
+        if cached and cached.url is None:
+            logger.info(f"Skipping {movie.title} in {region}, cached as not found on werstreamt.es")
             return None
+        if cached:
+            try:
+                return self._subscription_services(cached.url)
+            except (PageNotFound, MissingNodes) as e:
+                logger.info(f"Cached URL {cached.url} for {movie.title} is stale ({type(e).__name__}), resolving again")
 
-    def get_streaming_services(self, movie_url):
+        # Search for the movie on werstreamt.es
+        movie_url = self._search(movie.title, movie.year, region)
+        result.urls[region] = movie_url
         if not movie_url:
-            return []
+            logger.warning(f"Movie not found on werstreamt.es in {region}: {movie.title}")
+            return None
 
+        return self._subscription_services(movie_url)
+
+    def check_movie(self, movie, regions=None):
+        """Scrape the current services of a movie without writing to the database.
+
+        Only the regions in which someone tracks the movie are visited, the
+        default region if nobody does. Returns a ScrapeResult for apply_result,
+        failures are reported and marked on the result.
+        """
+        regions = regions or TrackedMovie.regions(movie.id) or [DEFAULT_REGION]
+        logger.info(f"Checking streaming availability for {movie.title} ({movie.year}) in {', '.join(regions)}")
+        result = ScrapeResult()
         try:
-            logger.info(f"Getting streaming services from: {movie_url}")
-            self.driver.get(movie_url)
-            time.sleep(2)  # Wait for page to load
-
-            # Find streaming service elements
-            streaming_services = []
-            
-            # Look for subscription streaming services
-            try:
-                logger.info("Looking for subscription section...")
-                subscription_section = self.wait.until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, '.subscription'))
-                )
-                services = subscription_section.find_elements(By.CSS_SELECTOR, '.provider-item')
-                
-                logger.info(f"Found {len(services)} streaming services")
-                for service in services:
-                    name = service.get_attribute('title')
-                    if name:
-                        streaming_services.append({
-                            'service': name,
-                            'type': 'subscription'
-                        })
-                        logger.info(f"Found streaming service: {name}")
-            except TimeoutException:
-                logger.info("No subscription services found")
-                pass  # No subscription services found
-
-            return streaming_services
-
-        except WebDriverException as e:
-            error_msg = f"WebDriver error getting streaming services from {movie_url}: {str(e)}\n{traceback.format_exc()}"
-            logger.error(error_msg)
-            if not self.structure_error_reported:
-                notifier.send_scraping_failure_notification(error_msg)
-                self.structure_error_reported = True
-            return []
+            for region in regions:
+                services = self._resolve_streaming_services(movie, result, region)
+                result.services[region] = None if services is None else [s['service'] for s in services]
         except Exception as e:
-            error_msg = f"Error getting streaming services from {movie_url}: {str(e)}\n{traceback.format_exc()}"
-            logger.error(error_msg)
-            if not self.structure_error_reported:
-                notifier.send_scraping_failure_notification(error_msg)
-                self.structure_error_reported = True
-            return []
-
-    def update_movie_availability(self, movie):
-        """Update streaming availability for a single movie"""
-        logger.info(f"Updating streaming availability for {movie.title} ({movie.year})")
-        
-        try:
-            # Search for the movie on werstreamt.es
-            movie_url = self.search_movie(movie.title, movie.year)
-            if not movie_url:
-                logger.warning(f"Movie not found on werstreamt.es: {movie.title}")
-                return
-
-            # Get current streaming services
-            streaming_services = self.get_streaming_services(movie_url)
-            
-            # Update database
+            self._report_error(e, f"Error updating movie {movie.title}: {str(e)}\n{traceback.format_exc()}")
+            result.failed = True
+        return result
+
+def apply_result(movie, result, now=None):
+    """Write a ScrapeResult to the database and plan the next check, the caller commits.
+
+    Returns the change sets of StreamingAvailability.sync for the regions the
+    movie was found in, or None if it could not be checked.
+    """
+    now = now or datetime.utcnow()
+    for region, url in result.urls.items():
+        StreamingUrl.remember(movie.imdb_id, url, SCRAPER_URL_TTL if url else SCRAPER_NOT_FOUND_TTL, region)
+    if result.failed:
+        result.outcome = 'failed'
+        defer_check(movie, now)
+        return None
+
+    changes = []
+    result.outcome = 'not_found'
+    for region, services in result.services.items():
+        if services is None:
+            continue
+        region_changes = StreamingAvailability.sync(movie.imdb_id, services, region)
+        changes.append(region_changes)
+        if region_changes['added'] or region_changes['removed']:
+            movie.availability_changed_at = now
+            result.outcome = 'changed'
+        elif result.outcome != 'changed':
+            result.outcome = 'unchanged'
+        logger.info(f"Streaming services for {movie.title} in {region}: "
+                    f"+{region_changes['added']} -{region_changes['removed']}")
+
+    movie.last_checked_at = now
+    schedule_next_check(movie, now)
+    return changes
+
+def scrape_movies(app, movie_ids, workers=SCRAPER_WORKERS, errors=None, run_id=None, max_attempts=1, more=None):
+    """Update the given movies on a pool of scraper workers, returns the finished pool"""
+    pool = ScraperPool(app, lambda: StreamingScraper(rate_limiter=rate_limiter, errors=errors, breaker=circuit_breaker),
+                       apply_result, workers, commit_every=SCRAPER_COMMIT_BATCH,
+                       on_commit=process_availability_changes, errors=errors, run_id=run_id,
+                       max_attempts=max_attempts, breaker=circuit_breaker,
+                       lease_timeout=SCRAPE_LEASE_TIMEOUT if run_id else None)
+    pool.run(movie_ids, more)
+    return pool
+
+def start_run(kind, triggered_by_user_id=None):
+    """Take the scrape lock, returns the new ScrapeRun or None if another run is active.
+
+    If the active run's process died, that run is taken over and returned.
+    """
+    run = ScrapeRun.start(kind, triggered_by_user_id)
+    if run is None:
+        active = ScrapeRun.active()
+        logger.info(f"Not starting a {kind} scrape, run {active.id if active else '?'} is still active")
+    return run
+
+def _select_movie_ids(kind, batch_size=REFRESH_BATCH_SIZE):
+    if kind == 'refresh':
+        return due_movie_ids(batch_size)
+    return None  # every tracked movie
+
+def _lease(run_id):
+    movie_ids = ScrapeItem.lease(run_id, instance_id(), SCRAPE_LEASE_SIZE, SCRAPE_LEASE_TIMEOUT)
+    db.session.commit()
+    return movie_ids
+
+def _wait_for_retries(app, run_id):
+    """Sleep until the next retry or expired lease of the run is due, returns False if the run has to stop"""
+    while True:
+        with app.app_context():
+            retry_at = ScrapeItem.next_retry_at(run_id)
+            if retry_at is None:
+                return True
+            stop = ScrapeRun.heartbeat(run_id)
+            db.session.commit()
+        if stop:
+            return False
+        delay = (retry_at - datetime.utcnow()).total_seconds()
+        if delay <= 0:
+            return True
+        time.sleep(min(delay, HEARTBEAT_INTERVAL))
+
+def _run(app, kind, workers, run_id=None, batch_size=REFRESH_BATCH_SIZE, joined=False):
+    """Scrape movies as one tracked, single-flight and resumable run.
+
+    The movies of a new run are checkpointed as ScrapeItems first. Then the
+    workers lease due items until none are pending; failed movies wait for
+    their backoff and are retried later. Workers in other processes can
+    share the run (joined=True), a joined worker that fails leaves the run
+    to the others.
+    """
+    with app.app_context():
+        run = db.session.get(ScrapeRun, run_id) if run_id else start_run(kind)
+        if run is None:
+            return
+        run_id, kind, resumed = run.id, run.kind, run.total is not None
+
+    with _local_runs_lock:
+        if run_id in _local_runs:
+            return
+        _local_runs.add(run_id)
+
+    errors = ErrorAggregator(run_id)
+    status = 'finished'
+    max_attempts = SCRAPER_MAX_ATTEMPTS if kind == 'full' else 1
+    try:
+        with app.app_context():
+            if resumed:
+                logger.info(f"Working on {kind} scrape run {run_id}")
+            else:
+                total = ScrapeItem.add(run_id, _select_movie_ids(kind, batch_size))
+                if not total and kind == 'refresh':
+                    # Nothing due, don't keep a record of the empty run
+                    db.session.delete(db.session.get(ScrapeRun, run_id))
+                    db.session.commit()
+                    return
+                ScrapeRun.query.filter_by(id=run_id).update({'total': total})
+                db.session.commit()
+
+        while True:
+            with app.app_context():
+                movie_ids = _lease(run_id)
+            if movie_ids:
+                logger.info(f"Scrape run {run_id}: updating leased movies using {workers} workers")
+                pool = scrape_movies(app, movie_ids, workers, errors, run_id, max_attempts,
+                                     more=lambda: _lease(run_id))
+                if pool.cancelled:
+                    break
+                if not pool.processed:
+                    raise RuntimeError("No movie could be processed, is the WebDriver available?")
+            if not _wait_for_retries(app, run_id):
+                break
+            with app.app_context():
+                if ScrapeItem.next_retry_at(run_id) is None:
+                    break
+
+        logger.info(f"Finished scrape run {run_id}")
+    except Exception as e:
+        status = 'failed'
+        error_msg = f"Error in {kind} scrape run {run_id}: {str(e)}\n{traceback.format_exc()}"
+        logger.error(error_msg)
+        errors.record(e, error_msg)
+    finally:
+        errors.finish(app)
+        with app.app_context():
             try:
-                # Remove old entries
-                old_count = StreamingAvailability.query.filter_by(movie_id=movie.imdb_id).delete()
-                logger.info(f"Removed {old_count} old streaming entries")
-                
-                # Add new entries
-                for service_info in streaming_services:
-                    availability = StreamingAvailability(
-                        movie_id=movie.imdb_id,
-                        service=service_info['service'],
-                        region='DE',  # Hardcoded for now
-                        added_by_user_id=1  # System user ID
-                    )
-                    db.session.add(availability)
-                
+                ScrapeItem.release(run_id, instance_id())
                 db.session.commit()
-                logger.info(f"Updated streaming services for {movie.title}: {[s['service'] for s in streaming_services]}")
-                
+                if not (joined and status == 'failed'):
+                    ScrapeRun.finish(run_id, status)
             except Exception as e:
                 db.session.rollback()
-                error_msg = f"Database error updating {movie.title}: {str(e)}\n{traceback.format_exc()}"
-                logger.error(error_msg)
-                if not self.structure_error_reported:
-                    notifier.send_scraping_failure_notification(error_msg)
-                    self.structure_error_reported = True
-                
-        except Exception as e:
-            error_msg = f"Error updating movie {movie.title}: {str(e)}\n{traceback.format_exc()}"
-            logger.error(error_msg)
-            if not self.structure_error_reported:
-                notifier.send_scraping_failure_notification(error_msg)
-                self.structure_error_reported = True
-
-def update_all_movies():
-    """Update streaming availability for all movies in the database"""
+                logger.error(f"Could not finish scrape run {run_id}: {str(e)}")
+        with _local_runs_lock:
+            _local_runs.discard(run_id)
+
+def update_all_movies(app=None, workers=SCRAPER_WORKERS, run_id=None):
+    """Update streaming availability for every movie on a user's list.
+
+    run_id continues a run the caller already started with start_run or
+    resumed with ScrapeRun.resume; finished movies are skipped.
+    """
     logger.info("Starting update_all_movies()")
-    try:
-        scraper = StreamingScraper()
-        movies = Movie.query.all()
-        logger.info(f"Found {len(movies)} movies to update")
-        
-        for movie in movies:
-            try:
-                scraper.update_movie_availability(movie)
-                time.sleep(2)  # Be nice to the website
-            except Exception as e:
-                error_msg = f"Error processing movie {movie.title}: {str(e)}\n{traceback.format_exc()}"
-                logger.error(error_msg)
-                if not scraper.structure_error_reported:
-                    notifier.send_scraping_failure_notification(error_msg)
-                    scraper.structure_error_reported = True
-                continue
-        
-        logger.info("Finished updating all movies")
-    except Exception as e:
-        error_msg = f"Error in update_all_movies: {str(e)}\n{traceback.format_exc()}"
-        logger.error(error_msg)
-        notifier.send_scraping_failure_notification(error_msg)
-    finally:
-        if 'scraper' in locals():
-            scraper.__del__() 
\ No newline at end of file
+    app = app or current_app._get_current_object()
+    _run(app, 'full', workers, run_id)
+
+def refresh_due_movies(app=None, batch_size=REFRESH_BATCH_SIZE, workers=SCRAPER_WORKERS):
+    """Update the next batch of movies whose planned check is due.
+
+    Resumes an interrupted run first if there is one.
+    """
+    app = app or current_app._get_current_object()
+    _run(app, 'refresh', workers, batch_size=batch_size)
+
+def join_active_run(app=None, workers=SCRAPER_WORKERS):
+    """Lend this process's workers to the active run, wherever it was started"""
+    app = app or current_app._get_current_object()
+    with app.app_context():
+        run = ScrapeRun.active()
+        # A run without total is still creating its items
+        if run is None or run.total is None or run.cancel_requested:
+            return
+        run_id = run.id
+    _run(app, None, workers, run_id, joined=True)
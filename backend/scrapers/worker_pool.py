@@ -0,0 +1,233 @@
+import logging
+import queue
+import threading
+import time
+import traceback
+
+from models import db, Movie, ScrapeRun, ScrapeItem
+from models.lease import instance_id
+
+logger = logging.getLogger(__name__)
+
+# How often workers report that the run is alive and look for a cancel request
+HEARTBEAT_INTERVAL = 10
+
+
+class ScraperPool:
+    """Runs a fixed number of long-lived scraper workers over a shared work queue.
+
+    Every worker owns one scraper (and therefore one WebDriver) and runs inside
+    its own application context, so it also gets its own database session.
+    Scraping only reads from the database; workers collect ``commit_every``
+    results and then write them with ``apply(movie, result)`` in one short
+    transaction, handing the change sets of every committed batch to
+    ``on_commit``. Scrapers are recycled after a crash or once they have
+    loaded too many pages. Failures are counted in ``errors`` (an
+    ErrorAggregator). With a ``run_id`` every written movie is checkpointed
+    in the same transaction (see ScrapeItem) and counted on its ScrapeRun;
+    failed movies are retried in a later pass until ``max_attempts``.
+    While the circuit ``breaker`` is open no worker starts on a new movie.
+    With a ``lease_timeout`` the heartbeat also renews this process's leases
+    on the run's items, so they are not handed to another process while the
+    workers wait.
+    """
+
+    def __init__(self, app, scraper_factory, apply, workers=1, commit_every=1, on_commit=None, errors=None,
+                 run_id=None, max_attempts=1, breaker=None, lease_timeout=None):
+        self.app = app
+        self.apply = apply
+        self.max_attempts = max_attempts
+        self.breaker = breaker
+        self.on_commit = on_commit
+        self.errors = errors
+        self.run_id = run_id
+        self.lease_timeout = lease_timeout
+        self.scraper_factory = scraper_factory
+        self.workers = max(1, workers)
+        self.commit_every = max(1, commit_every)
+        self.queue = queue.Queue()
+        self.processed = 0
+        self.changes = []
+        self.cancelled = False
+        self._heartbeat_at = 0
+        self._lock = threading.Lock()
+        self._refill_lock = threading.Lock()
+        self.more = None
+
+    def run(self, movie_ids, more=None):
+        """Process all given movie ids and block until the queue is drained.
+
+        more is called whenever the queue runs dry and returns further movie
+        ids (e.g. leased from the database), or an empty list once there are none.
+        """
+        self.more = more
+        for movie_id in movie_ids:
+            self.queue.put(movie_id)
+
+        threads = [
+            threading.Thread(target=self._work, name=f'scraper-worker-{index}', daemon=True)
+            for index in range(min(self.workers, len(movie_ids)))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if self.cancelled:
+            logger.info(f"Scraper pool cancelled with {self.queue.qsize()} movies left in the queue")
+        elif not self.queue.empty():
+            logger.error(f"Scraper pool stopped with {self.queue.qsize()} movies left in the queue")
+        return self.processed
+
+    def _work(self):
+        with self.app.app_context():
+            scraper = None
+            batch = []
+            try:
+                while not self._should_stop():
+                    if self.breaker and not self.breaker.allow():
+                        # Keep sending heartbeats while the site gets a break
+                        time.sleep(min(max(self.breaker.remaining(), 1), HEARTBEAT_INTERVAL))
+                        continue
+
+                    movie_id = self._next()
+                    if movie_id is None:
+                        break
+
+                    if scraper is None:
+                        try:
+                            scraper = self.scraper_factory()
+                        except Exception as e:
+                            # Give the item back so another worker can still pick it up
+                            logger.error(f"Could not create scraper: {str(e)}\n{traceback.format_exc()}")
+                            self.queue.put(movie_id)
+                            break
+
+                    self._process(scraper, movie_id, batch)
+                    if len(batch) >= self.commit_every:
+                        self._commit(batch)
+
+                    if scraper.needs_recycle:
+                        logger.info(f"Recycling WebDriver after {scraper.pages_loaded} pages "
+                                    f"(crashed: {scraper.crashed})")
+                        scraper.close()
+                        scraper = None
+            finally:
+                self._commit(batch)
+                if scraper is not None:
+                    scraper.close()
+                db.session.remove()
+
+    def _next(self):
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            if self.more is None:
+                return None
+
+        # One worker refills the queue, the others wait for its result
+        with self._refill_lock:
+            try:
+                return self.queue.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                movie_ids = self.more()
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Could not fetch more work: {str(e)}\n{traceback.format_exc()}")
+                return None
+            for movie_id in movie_ids[1:]:
+                self.queue.put(movie_id)
+            return movie_ids[0] if movie_ids else None
+
+    def _should_stop(self):
+        """Send the run's heartbeat now and then and stop once it was cancelled"""
+        if self.run_id is None or self.cancelled:
+            return self.cancelled
+        with self._lock:
+            if time.monotonic() - self._heartbeat_at < HEARTBEAT_INTERVAL:
+                return False
+            self._heartbeat_at = time.monotonic()
+        try:
+            cancelled = ScrapeRun.heartbeat(self.run_id)
+            if self.lease_timeout:
+                ScrapeItem.renew(self.run_id, instance_id(), self.lease_timeout)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Could not update scrape run {self.run_id}: {str(e)}")
+            return False
+        if cancelled:
+            logger.info(f"Scrape run {self.run_id} was cancelled")
+            self.cancelled = True
+        return self.cancelled
+
+    def _process(self, scraper, movie_id, batch):
+        try:
+            movie = db.session.get(Movie, movie_id)
+            if movie:
+                batch.append((movie_id, scraper.check_movie(movie)))
+        except Exception as e:
+            error_msg = f"Error processing movie {movie_id}: {str(e)}\n{traceback.format_exc()}"
+            logger.error(error_msg)
+            if self.errors:
+                self.errors.record(e, error_msg)
+            self._record_failures([movie_id])
+        finally:
+            with self._lock:
+                self.processed += 1
+
+    def _commit(self, batch):
+        if not batch:
+            return
+        try:
+            written = {}
+            for movie_id, result in batch:
+                movie = db.session.get(Movie, movie_id)
+                if movie:
+                    changes = self.apply(movie, result)
+                    written[movie_id] = (result.outcome, changes)
+            self._checkpoint({movie_id: outcome for movie_id, (outcome, _) in written.items()},
+                             position=batch[-1][0])
+            db.session.commit()
+            committed = [
+                region_changes for _, changes in written.values() for region_changes in changes or ()
+                if region_changes['added'] or region_changes['removed']
+            ]
+            with self._lock:
+                self.changes.extend(committed)
+        except Exception as e:
+            # The movies keep their old next_check_at and are picked up again
+            db.session.rollback()
+            error_msg = f"Error committing batch {[movie_id for movie_id, _ in batch]}: {str(e)}\n{traceback.format_exc()}"
+            logger.error(error_msg)
+            if self.errors:
+                self.errors.record(e, error_msg)
+            self._record_failures([movie_id for movie_id, _ in batch])
+            committed = []
+        finally:
+            batch.clear()
+            # Keep the identity map small, workers live for the whole run
+            db.session.expunge_all()
+
+        if self.errors:
+            self.errors.flush()
+        if committed and self.on_commit:
+            self.on_commit(committed)
+
+    def _checkpoint(self, outcomes, position=None):
+        if not self.run_id:
+            return
+        final, retries = ScrapeItem.checkpoint(self.run_id, outcomes, self.max_attempts)
+        ScrapeRun.add_progress(self.run_id, final, retries, position)
+
+    def _record_failures(self, movie_ids):
+        if not self.run_id:
+            return
+        try:
+            self._checkpoint({movie_id: 'failed' for movie_id in movie_ids})
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Could not update scrape run {self.run_id}: {str(e)}")
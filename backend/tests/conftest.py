@@ -0,0 +1,74 @@
+import os
+
+# The app configures itself on import, point it at a private in-memory database
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ['SCHEDULER_ENABLED'] = 'false'
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import app as flask_app
+from models import db, User, Movie, MovieList, MovieInList, TrackedMovie
+
+
+@pytest.fixture
+def app():
+    """The app with empty tables, inside an application context"""
+    with flask_app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield flask_app
+        db.session.remove()
+
+
+@pytest.fixture
+def user(app):
+    user = User(username='alice', email='alice@example.com')
+    user.set_password('secret')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def client(app, user):
+    """Test client logged in as user"""
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user.id)
+        session['_fresh'] = True
+    return client
+
+
+@pytest.fixture
+def queries():
+    """SQL statements sent while the test runs"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(Engine, 'before_cursor_execute', record)
+    yield statements
+    event.remove(Engine, 'before_cursor_execute', record)
+
+
+@pytest.fixture
+def make_list(app):
+    """Factory creating a list of a user with count new (tracked) movies"""
+    def make(user, name, count, tracked=True):
+        movie_list = MovieList(name=name, user_id=user.id)
+        db.session.add(movie_list)
+        db.session.flush()
+        for index in range(count):
+            movie = Movie(imdb_id=f'tt{movie_list.id:03d}{index:04d}', title=f'{name} {index}', year='2000')
+            db.session.add(movie)
+            db.session.flush()
+            db.session.add(MovieInList(movie_id=movie.id, list_id=movie_list.id))
+            if tracked:
+                db.session.add(TrackedMovie(movie_id=movie.id, region=user.region, watcher_count=1,
+                                            subscriber_count=0))
+        db.session.commit()
+        return movie_list
+    return make
@@ -0,0 +1,39 @@
+from models import db, AvailabilityMatch
+from utils.availability_matcher import match_changes
+
+
+def _change(movie_list, added=(), removed=(), region='DE'):
+    return {'movie_id': movie_list.movies[0].movie_ref.imdb_id, 'region': region,
+            'added': list(added), 'removed': list(removed)}
+
+
+def test_subscribers_watching_the_movie_are_matched_once(app, user, make_list):
+    user.streaming_services = ['Netflix']
+    movie_list = make_list(user, 'watchlist', 1)
+
+    matches = match_changes([_change(movie_list, added=['Netflix', 'Sky'])])
+    db.session.commit()
+    assert [match.service for match in matches[user.id]] == ['Netflix']
+
+    assert match_changes([_change(movie_list, added=['Netflix'])]) == {}
+    assert AvailabilityMatch.query.count() == 1
+
+
+def test_a_removed_service_matches_again_when_it_returns(app, user, make_list):
+    user.streaming_services = ['Netflix']
+    movie_list = make_list(user, 'watchlist', 1)
+    match_changes([_change(movie_list, added=['Netflix'])])
+    db.session.commit()
+
+    match_changes([_change(movie_list, removed=['Netflix'])])
+    db.session.commit()
+    assert AvailabilityMatch.query.count() == 0
+
+    assert user.id in match_changes([_change(movie_list, added=['Netflix'])])
+
+
+def test_changes_in_another_region_do_not_match(app, user, make_list):
+    user.streaming_services = ['Netflix']
+    movie_list = make_list(user, 'watchlist', 1)
+
+    assert match_changes([_change(movie_list, added=['Netflix'], region='AT')]) == {}
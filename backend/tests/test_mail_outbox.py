@@ -0,0 +1,60 @@
+import smtplib
+
+import pytest
+
+from models import db, OutboxEmail
+from utils import mail_outbox
+from utils.mail_outbox import enqueue_email, drain_outbox, PRIORITY_TRANSACTIONAL
+
+
+class FakeServer:
+    def __init__(self, fail=None):
+        self.fail = fail
+        self.sent = []
+        self.closed = False
+
+    def send_message(self, msg):
+        if self.fail:
+            raise self.fail
+        self.sent.append(msg['Subject'])
+
+    def quit(self):
+        self.closed = True
+
+
+class Connections(list):
+    """Connections opened by the outbox, new ones fail with fail if set"""
+    fail = None
+
+    def connect(self):
+        self.append(FakeServer(self.fail))
+        return self[-1]
+
+
+@pytest.fixture
+def servers(monkeypatch):
+    opened = Connections()
+    monkeypatch.setattr(mail_outbox.notifier, 'connect', opened.connect)
+    monkeypatch.setattr(mail_outbox, 'MAIL_MAX_PER_MINUTE', 0)
+    return opened
+
+
+def test_transactional_mail_is_sent_before_digests(app, servers):
+    for index in range(3):
+        enqueue_email(f'Digest {index}', 'bob@example.com', 'body')
+    enqueue_email('Password Reset', 'bob@example.com', 'body', priority=PRIORITY_TRANSACTIONAL)
+    db.session.commit()
+
+    assert drain_outbox(app, limit=2) == 2
+    assert servers[0].sent == ['Password Reset', 'Digest 0']
+
+
+def test_a_dropped_connection_is_closed_and_the_rest_kept(app, servers):
+    servers.fail = smtplib.SMTPServerDisconnected('gone')
+    enqueue_email('Digest', 'bob@example.com', 'body')
+    enqueue_email('Digest', 'carol@example.com', 'body')
+    db.session.commit()
+
+    assert drain_outbox(app) == 0
+    assert servers and all(server.closed for server in servers)
+    assert [message.attempts for message in OutboxEmail.query.order_by(OutboxEmail.id)] == [1, 0]
@@ -0,0 +1,99 @@
+import pytest
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects import postgresql
+
+from models import db, User, TrackedMovie, StreamingAvailability, AvailabilityInterval
+from models.migrations import upgrade_schema, _add_column
+
+
+class _RecordingConnection:
+    dialect = postgresql.dialect()
+
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, statement):
+        self.statements.append(str(statement))
+
+
+def test_added_columns_render_their_default_for_the_dialect():
+    conn = _RecordingConnection()
+    _add_column(conn, User.__table__, User.__table__.c.region)
+
+    assert conn.statements == [
+        """ALTER TABLE "user" ADD COLUMN "region" VARCHAR(10) DEFAULT 'DE' NOT NULL"""
+    ]
+
+
+def test_missing_columns_are_added_with_their_default(app, user):
+    with db.engine.begin() as conn:
+        conn.execute(text('ALTER TABLE user DROP COLUMN region'))
+
+    upgrade_schema()
+
+    columns = {column['name']: column for column in inspect(db.engine).get_columns('user')}
+    assert not columns['region']['nullable']
+    assert db.session.execute(text('SELECT region FROM user')).scalar() == 'DE'
+
+
+def test_changed_primary_keys_are_rebuilt(app):
+    with db.engine.begin() as conn:
+        conn.execute(text('DROP TABLE service_demand'))
+        conn.execute(text('CREATE TABLE service_demand (service VARCHAR(50) PRIMARY KEY, subscriber_count INTEGER)'))
+        conn.execute(text("INSERT INTO service_demand VALUES ('Netflix', 3)"))
+
+    upgrade_schema()
+
+    assert inspect(db.engine).get_pk_constraint('service_demand')['constrained_columns'] == ['service', 'region']
+    rows = db.session.execute(text('SELECT service, region, subscriber_count FROM service_demand')).all()
+    assert rows == [('Netflix', 'DE', 3)]
+
+
+def test_new_count_tables_are_filled_once(app, user, make_list):
+    make_list(user, 'watchlist', 2, tracked=False)
+    with db.engine.begin() as conn:
+        conn.execute(text('DROP TABLE tracked_movie'))
+
+    upgrade_schema()
+    assert TrackedMovie.query.count() == 2
+
+    TrackedMovie.query.delete()
+    db.session.commit()
+    upgrade_schema()
+    assert TrackedMovie.query.count() == 0
+
+
+def test_availability_history_is_backfilled_once(app, user, make_list):
+    movie_list = make_list(user, 'watchlist', 1)
+    db.session.add(StreamingAvailability(movie_id=movie_list.movies[0].movie_ref.imdb_id, service='Netflix'))
+    db.session.commit()
+    with db.engine.begin() as conn:
+        conn.execute(text('DROP TABLE availability_interval'))
+
+    upgrade_schema()
+    upgrade_schema()
+    assert AvailabilityInterval.query.filter_by(service='Netflix', closed_at=None).count() == 1
+
+
+def test_rebuilds_keep_the_first_of_duplicate_keys(app):
+    with db.engine.begin() as conn:
+        conn.execute(text('DROP TABLE service_demand'))
+        conn.execute(text('CREATE TABLE service_demand (service VARCHAR(50), region VARCHAR(10), subscriber_count INTEGER)'))
+        conn.execute(text("INSERT INTO service_demand VALUES ('Netflix', 'DE', 3), ('Netflix', 'DE', 5), ('Netflix', 'AT', 1)"))
+
+    upgrade_schema()
+
+    rows = db.session.execute(text('SELECT service, region, subscriber_count FROM service_demand ORDER BY region')).all()
+    assert rows == [('Netflix', 'AT', 1), ('Netflix', 'DE', 3)]
+
+
+def test_rebuilds_fail_on_rows_they_cannot_copy(app):
+    with db.engine.begin() as conn:
+        conn.execute(text('DROP TABLE service_demand'))
+        conn.execute(text('CREATE TABLE service_demand (service VARCHAR(50) PRIMARY KEY, subscriber_count INTEGER)'))
+        conn.execute(text("INSERT INTO service_demand VALUES ('Netflix', NULL)"))
+
+    with pytest.raises(IntegrityError):
+        upgrade_schema()
+    assert db.session.execute(text('SELECT COUNT(*) FROM service_demand')).scalar() == 1
@@ -0,0 +1,79 @@
+from models import db, StreamingAvailability
+
+
+def _query_count(client, queries, url):
+    queries.clear()
+    response = client.get(url)
+    assert response.status_code == 200
+    return len(queries)
+
+
+def test_list_endpoints_use_a_constant_number_of_queries(client, user, queries, make_list):
+    small = make_list(user, 'small', 2)
+    small_counts = [
+        _query_count(client, queries, '/api/movie-lists'),
+        _query_count(client, queries, f'/api/movie-lists/{small.id}?include=availability'),
+        _query_count(client, queries, f'/api/movie-lists/{small.id}/movies?include=availability'),
+    ]
+
+    large = make_list(user, 'large', 30)
+    for index in range(3):
+        make_list(user, f'more {index}', 10)
+    large_counts = [
+        _query_count(client, queries, '/api/movie-lists'),
+        _query_count(client, queries, f'/api/movie-lists/{large.id}?include=availability'),
+        _query_count(client, queries, f'/api/movie-lists/{large.id}/movies?include=availability'),
+    ]
+
+    assert large_counts == small_counts
+
+
+def test_unchanged_lists_answer_not_modified(client, user, make_list):
+    movie_list = make_list(user, 'watchlist', 3)
+    first = client.get('/api/movie-lists')
+    etag = first.headers['ETag']
+
+    assert client.get('/api/movie-lists', headers={'If-None-Match': etag}).status_code == 304
+
+    response = client.delete(f'/api/movie-lists/{movie_list.id}/movies/{movie_list.movies[0].movie_ref.imdb_id}')
+    assert response.status_code == 200
+    assert client.get('/api/movie-lists', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_availability_change_invalidates_the_list_etag(client, user, make_list):
+    movie_list = make_list(user, 'watchlist', 2)
+    url = f'/api/movie-lists/{movie_list.id}?include=availability'
+    etag = client.get(url).headers['ETag']
+
+    imdb_id = movie_list.movies[0].movie_ref.imdb_id
+    StreamingAvailability.sync(imdb_id, ['Netflix'])
+    db.session.commit()
+
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    availability = {movie['movie_id']: movie['availability'] for movie in response.get_json()['movies']}
+    assert [entry['service'] for entry in availability[imdb_id]] == ['Netflix']
+
+
+def test_entries_are_paginated_with_a_cursor(client, user, make_list):
+    movie_list = make_list(user, 'watchlist', 7)
+    seen = []
+    cursor = None
+    while True:
+        url = f'/api/movie-lists/{movie_list.id}/movies?sort=title&limit=3'
+        if cursor:
+            url += f'&cursor={cursor}'
+        response = client.get(url)
+        assert response.status_code == 200
+        seen += [movie['title'] for movie in response.get_json()]
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+
+    assert seen == sorted(f'watchlist {index}' for index in range(7))
+
+
+def test_entries_reject_an_invalid_cursor(client, user, make_list):
+    movie_list = make_list(user, 'watchlist', 1)
+    response = client.get(f'/api/movie-lists/{movie_list.id}/movies?cursor=garbage')
+    assert response.status_code == 400
@@ -0,0 +1,11 @@
+from scheduler import init_scheduler, shutdown_scheduler
+
+
+def test_a_worker_joins_runs_on_a_scheduler_started_by_the_app(app):
+    scheduler = init_scheduler(app)
+    try:
+        assert scheduler.get_job('join_active_run') is None
+        assert init_scheduler(app, join_runs=True) is scheduler
+        assert scheduler.get_job('join_active_run') is not None
+    finally:
+        shutdown_scheduler(app)
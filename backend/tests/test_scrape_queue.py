@@ -0,0 +1,133 @@
+from datetime import datetime, timedelta
+
+from models import db, ScrapeRun, ScrapeItem
+from models.scrape_item import SCRAPE_RETRY_BASE
+from models.scrape_run import STALE_AFTER
+from scrapers import streaming_scraper
+
+LEASE = timedelta(minutes=15)
+
+
+def _start_run_with_items(user, make_list, count):
+    make_list(user, 'watchlist', count)
+    run = ScrapeRun.start('full')
+    ScrapeItem.add(run.id)
+    db.session.commit()
+    return run
+
+
+def test_only_one_run_is_active(app):
+    run = ScrapeRun.start('full')
+    assert run is not None
+    assert ScrapeRun.start('refresh') is None
+
+    ScrapeRun.finish(run.id)
+    assert ScrapeRun.start('refresh') is not None
+
+
+def test_a_stale_run_is_taken_over(app):
+    run = ScrapeRun.start('full')
+    run.heartbeat_at = datetime.utcnow() - STALE_AFTER - timedelta(minutes=1)
+    db.session.commit()
+
+    taken_over = ScrapeRun.start('refresh')
+    assert taken_over is not None
+    assert taken_over.id == run.id
+    assert taken_over.kind == 'full'
+
+
+def test_items_are_leased_to_one_holder_at_a_time(app, user, make_list):
+    run = _start_run_with_items(user, make_list, 5)
+
+    first = ScrapeItem.lease(run.id, 'worker-a', 3, LEASE)
+    second = ScrapeItem.lease(run.id, 'worker-b', 3, LEASE)
+    db.session.commit()
+
+    assert len(first) == 3
+    assert len(second) == 2
+    assert not set(first) & set(second)
+    assert ScrapeItem.lease(run.id, 'worker-c', 3, LEASE) == []
+
+
+def test_expired_leases_are_handed_out_again(app, user, make_list):
+    run = _start_run_with_items(user, make_list, 2)
+    leased = ScrapeItem.lease(run.id, 'worker-a', 2, LEASE)
+    db.session.commit()
+
+    later = datetime.utcnow() + LEASE + timedelta(seconds=1)
+    assert ScrapeItem.lease(run.id, 'worker-b', 2, LEASE, now=later) == leased
+
+
+def test_renewed_leases_are_kept(app, user, make_list):
+    run = _start_run_with_items(user, make_list, 2)
+    ScrapeItem.lease(run.id, 'worker-a', 2, LEASE)
+    db.session.commit()
+
+    later = datetime.utcnow() + LEASE - timedelta(seconds=1)
+    assert ScrapeItem.renew(run.id, 'worker-a', LEASE, now=later) == 2
+    db.session.commit()
+    assert ScrapeItem.lease(run.id, 'worker-b', 2, LEASE, now=later + timedelta(seconds=2)) == []
+
+
+def test_failed_items_are_retried_with_backoff(app, user, make_list):
+    run = _start_run_with_items(user, make_list, 2)
+    failing, succeeding = ScrapeItem.lease(run.id, 'worker-a', 2, LEASE)
+    now = datetime.utcnow()
+
+    final, retries = ScrapeItem.checkpoint(run.id, {failing: 'failed', succeeding: 'unchanged'}, 3, now=now)
+    db.session.commit()
+    assert final == {'unchanged': 1}
+    assert retries == 1
+    assert ScrapeItem.next_retry_at(run.id) == now + SCRAPE_RETRY_BASE
+    assert ScrapeItem.lease(run.id, 'worker-a', 2, LEASE, now=now) == []
+
+    retry_at = now + SCRAPE_RETRY_BASE
+    assert ScrapeItem.lease(run.id, 'worker-a', 2, LEASE, now=retry_at) == [failing]
+    final, retries = ScrapeItem.checkpoint(run.id, {failing: 'failed'}, 3, now=retry_at)
+    assert retries == 1
+    item = ScrapeItem.query.filter_by(run_id=run.id, movie_id=failing).one()
+    assert item.next_attempt_at == retry_at + SCRAPE_RETRY_BASE * 2
+
+
+def test_items_give_up_after_max_attempts(app, user, make_list):
+    run = _start_run_with_items(user, make_list, 1)
+    (movie_id,) = ScrapeItem.lease(run.id, 'worker-a', 1, LEASE)
+
+    final, retries = ScrapeItem.checkpoint(run.id, {movie_id: 'failed'}, 1)
+    db.session.commit()
+
+    assert final == {'failed': 1}
+    assert retries == 0
+    assert ScrapeItem.next_retry_at(run.id) is None
+
+
+def test_checkpoints_count_each_item_once(app, user, make_list):
+    run = _start_run_with_items(user, make_list, 1)
+    (movie_id,) = ScrapeItem.lease(run.id, 'worker-a', 1, LEASE)
+
+    assert ScrapeItem.checkpoint(run.id, {movie_id: 'changed'}, 3) == ({'changed': 1}, 0)
+    # A second worker writing the same movie after its lease ran out does not count again
+    assert ScrapeItem.checkpoint(run.id, {movie_id: 'changed'}, 3) == ({}, 0)
+
+
+class CancelledPool:
+    """A pool whose run was cancelled before it got to any movie"""
+    def __init__(self, *args, **kwargs):
+        self.processed = 0
+        self.cancelled = False
+
+    def run(self, movie_ids, more=None):
+        self.cancelled = True
+        return self.processed
+
+
+def test_a_run_cancelled_before_any_movie_ends_as_cancelled(app, user, make_list, monkeypatch):
+    run = _start_run_with_items(user, make_list, 2)
+    ScrapeRun.query.filter_by(id=run.id).update({'total': 2, 'cancel_requested': True})
+    db.session.commit()
+    monkeypatch.setattr(streaming_scraper, 'ScraperPool', CancelledPool)
+
+    streaming_scraper._run(app, 'full', 1, run.id)
+
+    db.session.expire_all()
+    assert db.session.get(ScrapeRun, run.id).status == 'cancelled'
@@ -0,0 +1,137 @@
+"""
+Turns availability change sets from the scraper into per-user notifications.
+
+Instead of looping over every user, a batch of changes is resolved through two
+small indexes: imdb_id -> users watching the movie, and (service, region) ->
+those watchers subscribing to it in their region. Matches are persisted, so a user hears about a
+(movie, service) pair only once for as long as it stays available. New
+matches are mailed as one daily digest per user.
+"""
+import logging
+import traceback
+from datetime import datetime
+from flask import current_app
+
+from models import db, Movie, MovieList, MovieInList, User, AvailabilityMatch, UserService
+from utils.mail_outbox import enqueue_email
+
+logger = logging.getLogger(__name__)
+
+def watchers_by_movie(imdb_ids):
+    """Return {imdb_id: {user_id, ...}} for users having the movies on any list"""
+    index = {}
+    rows = db.session.query(Movie.imdb_id, MovieList.user_id).join(
+        MovieInList, MovieInList.movie_id == Movie.id
+    ).join(
+        MovieList, MovieInList.list_id == MovieList.id
+    ).filter(Movie.imdb_id.in_(imdb_ids)).distinct()
+    for imdb_id, user_id in rows:
+        index.setdefault(imdb_id, set()).add(user_id)
+    return index
+
+def subscribers_by_service(user_ids):
+    """Return {(service, region): {user_id, ...}} restricted to the given users"""
+    index = {}
+    rows = db.session.query(UserService.service, UserService.region, UserService.user_id).filter(
+        UserService.user_id.in_(user_ids)
+    )
+    for service, region, user_id in rows:
+        index.setdefault((service, region), set()).add(user_id)
+    return index
+
+def match_changes(changes):
+    """Record the (user, movie, service) pairs that became available through changes.
+
+    Pairs whose service disappeared are forgotten, so they match again when the
+    movie comes back. Returns {user_id: [AvailabilityMatch, ...]} of the new
+    matches only. The caller commits.
+    """
+    added = [(change['movie_id'], change['region'], service) for change in changes for service in change['added']]
+    removed = [(change['movie_id'], change['region'], service) for change in changes for service in change['removed']]
+
+    for imdb_id, region, service in removed:
+        AvailabilityMatch.query.filter_by(movie_id=imdb_id, region=region, service=service).delete()
+
+    if not added:
+        return {}
+
+    watchers = watchers_by_movie({imdb_id for imdb_id, _, _ in added})
+    subscribers = subscribers_by_service(set().union(*watchers.values()) if watchers else set())
+
+    already_matched = {
+        (match.user_id, match.movie_id, match.service, match.region)
+        for match in AvailabilityMatch.query.filter(
+            AvailabilityMatch.movie_id.in_(watchers.keys())
+        )
+    }
+
+    matches = {}
+    for imdb_id, region, service in added:
+        for user_id in watchers.get(imdb_id, set()) & subscribers.get((service, region), set()):
+            if (user_id, imdb_id, service, region) in already_matched:
+                continue
+            match = AvailabilityMatch(user_id=user_id, movie_id=imdb_id, service=service, region=region)
+            db.session.add(match)
+            matches.setdefault(user_id, []).append(match)
+    return matches
+
+def digest_body(username, items):
+    """Mail body listing (title, service) tuples"""
+    lines = "\n".join(f"            - {title} on {service}" for title, service in items)
+    return f"""
+            Hello {username},
+
+            The following movies from your lists are now available on your streaming services:
+
+{lines}
+
+            Enjoy watching!
+            WatchCall Team
+            """
+
+def enqueue_digests(app=None):
+    """Queue one mail per user covering all their matches that were not mailed yet"""
+    app = app or current_app._get_current_object()
+    with app.app_context():
+        try:
+            pending = db.session.query(AvailabilityMatch, Movie.title, User).join(
+                Movie, Movie.imdb_id == AvailabilityMatch.movie_id
+            ).join(
+                User, User.id == AvailabilityMatch.user_id
+            ).filter(AvailabilityMatch.notified_at.is_(None)).order_by(
+                AvailabilityMatch.user_id, Movie.title
+            ).all()
+
+            by_user = {}
+            for match, title, user in pending:
+                by_user.setdefault(user, []).append((match, title))
+
+            now = datetime.utcnow()
+            for user, items in by_user.items():
+                enqueue_email(
+                    subject="WatchCall: Movies from your lists are now streaming",
+                    recipient=user.email,
+                    body=digest_body(user.username, [(title, match.service) for match, title in items]),
+                    user_id=user.id
+                )
+                for match, _ in items:
+                    match.notified_at = now
+            db.session.commit()
+            logger.info(f"Queued availability digests for {len(by_user)} users")
+            return len(by_user)
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error queueing availability digests: {str(e)}\n{traceback.format_exc()}")
+            return 0
+
+def process_availability_changes(changes):
+    """Matching stage run after each committed scrape batch, mails go out with the next digest"""
+    if not changes:
+        return
+    try:
+        matches = match_changes(changes)
+        db.session.commit()
+        logger.info(f"Found new matches for {len(matches)} users")
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error matching availability changes: {str(e)}\n{traceback.format_exc()}")
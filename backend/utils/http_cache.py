@@ -0,0 +1,68 @@
+"""
+Conditional GET and response compression.
+
+Endpoints derive a strong ETag from cheap version stamps (revision counters)
+and answer 304 Not Modified before loading and serializing the payload.
+Large JSON responses are compressed with brotli (if installed) or gzip.
+"""
+import os
+import gzip
+import hashlib
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', 6))
+
+# Compressed responses get their own ETag, the suffix names the encoding
+ENCODING_SUFFIXES = {'br': '-br', 'gzip': '-gzip'}
+
+def make_etag(*parts):
+    """Hash the version stamps of a payload into an ETag value"""
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+def not_modified(etag):
+    """Return a 304 response if the client already holds this version, otherwise None"""
+    for variant in [etag] + [etag + suffix for suffix in ENCODING_SUFFIXES.values()]:
+        if request.if_none_match.contains(variant):
+            response = current_app.response_class(status=304)
+            return with_etag(response, variant)
+    return None
+
+def with_etag(response, etag):
+    """Tag a response; clients may keep it but have to revalidate before use"""
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def _encode(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=min(COMPRESS_LEVEL, 11))
+    return gzip.compress(data, compresslevel=COMPRESS_LEVEL)
+
+def compress_response(response):
+    """after_request hook compressing large JSON bodies for clients that accept it"""
+    if (response.status_code != 200 or response.direct_passthrough
+            or response.mimetype != 'application/json' or 'Content-Encoding' in response.headers):
+        return response
+
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+
+    response.vary.add('Accept-Encoding')
+    accepted = request.accept_encodings
+    encoding = 'br' if brotli and accepted['br'] else 'gzip' if accepted['gzip'] else None
+    if encoding is None:
+        return response
+
+    response.set_data(_encode(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(etag + ENCODING_SUFFIXES[encoding], weak)
+    return response
@@ -0,0 +1,145 @@
+"""
+DB-backed mail outbox.
+
+Request handlers and jobs only enqueue messages; drain_outbox sends them in
+the background over a single authenticated SMTP connection, throttled to the
+provider's limits and retried with exponential backoff. Transactional
+messages are sent right away by send_soon, the drain only retries them.
+"""
+import os
+import time
+import threading
+import logging
+import smtplib
+from datetime import datetime, timedelta
+from flask import current_app
+
+from models import db, OutboxEmail
+from utils.email_notifier import notifier
+
+logger = logging.getLogger(__name__)
+
+MAIL_MAX_ATTEMPTS = int(os.getenv('MAIL_MAX_ATTEMPTS', 6))
+MAIL_MAX_PER_MINUTE = int(os.getenv('MAIL_MAX_PER_MINUTE', 30))
+MAIL_DRAIN_BATCH = int(os.getenv('MAIL_DRAIN_BATCH', 200))
+# A claimed message is retried by another sender if it was not sent within this time
+MAIL_CLAIM_TIMEOUT = timedelta(minutes=10)
+
+PRIORITY_BULK = 0
+PRIORITY_TRANSACTIONAL = 10
+
+def enqueue_email(subject, recipient, body, user_id=None, priority=PRIORITY_BULK):
+    """Queue a message for the background sender, the caller commits"""
+    message = OutboxEmail(subject=subject, recipient=recipient, body=body, user_id=user_id, priority=priority)
+    db.session.add(message)
+    return message
+
+def _claim(message_id, now):
+    """Atomically take a message so that concurrent senders don't both send it"""
+    return OutboxEmail.query.filter(
+        OutboxEmail.id == message_id,
+        OutboxEmail.status == 'pending',
+        OutboxEmail.next_attempt_at <= now
+    ).update({'next_attempt_at': now + MAIL_CLAIM_TIMEOUT}, synchronize_session=False) == 1
+
+def _retry_later(message, error):
+    message.attempts += 1
+    message.last_error = error
+    if message.attempts >= MAIL_MAX_ATTEMPTS:
+        message.status = 'failed'
+        logger.error(f"Giving up on email {message.id} to {message.recipient}: {error}")
+    else:
+        message.next_attempt_at = datetime.utcnow() + timedelta(minutes=2 ** message.attempts)
+
+def _close(server):
+    if server is not None:
+        try:
+            server.quit()
+        except Exception:
+            pass
+
+def _send(message, server):
+    """Send a claimed message and record the outcome, the caller commits.
+
+    Returns the connection to go on with, None if it was dropped.
+    """
+    try:
+        if server is None:
+            server = notifier.connect()
+        try:
+            notifier.send_email(message.subject, message.recipient, message.body, server=server)
+        except smtplib.SMTPServerDisconnected:
+            # Providers drop idle or long-lived sessions, reconnect once
+            _close(server)
+            server = notifier.connect()
+            notifier.send_email(message.subject, message.recipient, message.body, server=server)
+        message.status = 'sent'
+        message.sent_at = datetime.utcnow()
+    except smtplib.SMTPRecipientsRefused as e:
+        message.attempts += 1
+        message.status = 'failed'
+        message.last_error = str(e)
+    except Exception as e:
+        _retry_later(message, str(e))
+        if not isinstance(e, smtplib.SMTPResponseException):
+            # Connection problems, the caller stops sending over it
+            _close(server)
+            return None
+    return server
+
+def send_soon(message, app=None):
+    """Send a committed transactional message now in a background thread.
+
+    Doesn't depend on the scheduler running; if sending fails the message
+    stays queued and the drain retries it.
+    """
+    app = app or current_app._get_current_object()
+    thread = threading.Thread(target=_send_now, args=(app, message.id), daemon=True)
+    thread.start()
+    return thread
+
+def _send_now(app, message_id):
+    with app.app_context():
+        if not _claim(message_id, datetime.utcnow()):
+            return
+        db.session.commit()
+        message = db.session.get(OutboxEmail, message_id)
+        _close(_send(message, None))
+        db.session.commit()
+
+def drain_outbox(app=None, limit=MAIL_DRAIN_BATCH):
+    """Send due messages over one reused SMTP connection, returns the number sent"""
+    app = app or current_app._get_current_object()
+    with app.app_context():
+        now = datetime.utcnow()
+        message_ids = [message_id for (message_id,) in db.session.query(OutboxEmail.id).filter(
+            OutboxEmail.status == 'pending',
+            OutboxEmail.next_attempt_at <= now
+        ).order_by(OutboxEmail.priority.desc(), OutboxEmail.next_attempt_at).limit(limit)]
+        if not message_ids:
+            return 0
+
+        server = None
+        sent = 0
+        interval = 60.0 / MAIL_MAX_PER_MINUTE if MAIL_MAX_PER_MINUTE > 0 else 0
+        try:
+            for message_id in message_ids:
+                if not _claim(message_id, now):
+                    continue
+                db.session.commit()
+                if server is not None and interval:
+                    time.sleep(interval)
+                message = db.session.get(OutboxEmail, message_id)
+
+                server = _send(message, server)
+                db.session.commit()
+                if message.status == 'sent':
+                    sent += 1
+                if server is None:
+                    # Connection problems: keep the rest for the next drain
+                    break
+        finally:
+            _close(server)
+
+        logger.info(f"Sent {sent} queued emails")
+        return sent
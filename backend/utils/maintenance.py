@@ -0,0 +1,48 @@
+import logging
+import traceback
+from flask import current_app
+from sqlalchemy import exists
+
+from models import db, Movie, MovieList, MovieInList, TrackedMovie, ServiceDemand
+
+logger = logging.getLogger(__name__)
+
+def cleanup_orphaned_entries(app=None):
+    """Remove MovieInList entries that point to non-existent movies or lists.
+
+    Foreign keys with ON DELETE CASCADE keep new orphans from appearing; this
+    only sweeps up rows left over from before they were enforced.
+    """
+    app = app or current_app._get_current_object()
+    with app.app_context():
+        try:
+            deleted = MovieInList.query.filter(db.or_(
+                ~exists().where(Movie.id == MovieInList.movie_id),
+                ~exists().where(MovieList.id == MovieInList.list_id)
+            )).delete(synchronize_session=False)
+            db.session.commit()
+            logger.info(f"Cleaned up {deleted} orphaned movie entries")
+            return deleted
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error during cleanup: {str(e)}\n{traceback.format_exc()}")
+            return 0
+
+def rebuild_tracked_movies(app=None):
+    """Recount watchers and service subscribers from scratch.
+
+    The endpoints keep both up to date as lists and subscriptions change;
+    this backfills them once and repairs any drift.
+    """
+    app = app or current_app._get_current_object()
+    with app.app_context():
+        try:
+            tracked = TrackedMovie.rebuild()
+            ServiceDemand.rebuild()
+            db.session.commit()
+            logger.info(f"Rebuilt watcher counts of {tracked} tracked movies")
+            return tracked
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error rebuilding tracked movies: {str(e)}\n{traceback.format_exc()}")
+            return 0
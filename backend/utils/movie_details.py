@@ -0,0 +1,69 @@
+import os
+import logging
+import traceback
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import exists
+
+from models import db, Movie, MovieInList
+from utils.omdb_client import omdb, limit_reached
+
+logger = logging.getLogger(__name__)
+
+DETAILS_MAX_AGE = timedelta(days=int(os.getenv('DETAILS_MAX_AGE_DAYS', 30)))
+DETAILS_BATCH_SIZE = int(os.getenv('DETAILS_BATCH_SIZE', 50))
+DETAILS_BACKFILL_LIMIT = int(os.getenv('DETAILS_BACKFILL_LIMIT', 500))
+# Movies whose lookup failed are tried again after this long instead of every run
+DETAILS_RETRY_AFTER = timedelta(hours=int(os.getenv('DETAILS_RETRY_AFTER_HOURS', 24)))
+
+def backfill_movie_details(app=None, limit=DETAILS_BACKFILL_LIMIT, batch_size=DETAILS_BATCH_SIZE):
+    """Store OMDb details for tracked movies that have none yet or whose copy is stale.
+
+    Movies without details come first, then the stalest ones. A failed
+    lookup records its time in details_fetched_at, so the movie waits
+    DETAILS_RETRY_AFTER (or DETAILS_MAX_AGE if it has older details) before
+    the next attempt. Each batch is committed on its own, so an interrupted
+    run keeps its progress; the run stops once OMDb reports the request limit.
+    """
+    app = app or current_app._get_current_object()
+    with app.app_context():
+        now = datetime.utcnow()
+        movie_ids = [movie_id for (movie_id,) in db.session.query(Movie.id).filter(
+            exists().where(MovieInList.movie_id == Movie.id),
+            db.or_(
+                Movie.details_fetched_at.is_(None),
+                Movie.details_fetched_at < now - DETAILS_MAX_AGE,
+                db.and_(Movie.details.is_(None), Movie.details_fetched_at < now - DETAILS_RETRY_AFTER)
+            )
+        ).order_by(Movie.details_fetched_at.is_(None).desc(), Movie.details_fetched_at.asc()).limit(limit)]
+        if not movie_ids:
+            return 0
+
+        logger.info(f"Backfilling OMDb details for {len(movie_ids)} movies")
+        stored = 0
+        exhausted = False
+        for start in range(0, len(movie_ids), batch_size):
+            batch = Movie.query.filter(Movie.id.in_(movie_ids[start:start + batch_size])).all()
+            try:
+                for movie in batch:
+                    data = omdb.get({'i': movie.imdb_id}, fresh=True)
+                    if limit_reached(data):
+                        exhausted = True
+                        break
+                    if data and 'Error' not in data:
+                        movie.store_details(data)
+                        stored += 1
+                    else:
+                        movie.details_fetched_at = datetime.utcnow()
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error backfilling movie details: {str(e)}\n{traceback.format_exc()}")
+            finally:
+                db.session.expunge_all()
+            if exhausted:
+                logger.warning("OMDb request limit reached, stopping the details backfill")
+                break
+
+        logger.info(f"Stored OMDb details for {stored} movies")
+        return stored
@@ -0,0 +1,191 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+OMDB_BASE_URL = 'http://www.omdbapi.com/'
+
+def limit_reached(data):
+    """Whether an OMDb response says the daily request limit of the API key is used up"""
+    return bool(data) and 'limit' in str(data.get('Error', '')).lower()
+
+
+class TTLCache:
+    """Thread-safe in-process LRU cache whose entries expire after a TTL."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class SQLiteCache:
+    """Cache tier in a SQLite file, shared by all worker processes on a host."""
+
+    def __init__(self, path):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS omdb_cache '
+                '(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)'
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key):
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    'SELECT value FROM omdb_cache WHERE key = ? AND expires_at > ?', (key, time.time())
+                ).fetchone()
+            return json.loads(row[0]) if row else None
+        except sqlite3.Error as e:
+            logger.warning(f"OMDb disk cache read failed: {str(e)}")
+            return None
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO omdb_cache (key, value, expires_at) VALUES (?, ?, ?)',
+                    (key, json.dumps(value), now + ttl)
+                )
+                conn.execute('DELETE FROM omdb_cache WHERE expires_at < ?', (now,))
+        except sqlite3.Error as e:
+            logger.warning(f"OMDb disk cache write failed: {str(e)}")
+
+
+class _PendingRequest:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+class OmdbClient:
+    """Cached OMDb API client.
+
+    Lookups go through an in-process LRU, then the optional shared SQLite
+    tier (OMDB_CACHE_DB), and only then to omdbapi.com over a pooled session.
+    Concurrent misses for the same key wait for a single upstream request.
+    """
+
+    def __init__(self):
+        self.ttl = int(os.getenv('OMDB_CACHE_TTL', 24 * 3600))
+        self.not_found_ttl = int(os.getenv('OMDB_NOT_FOUND_TTL', 3600))
+        self.timeout = float(os.getenv('OMDB_TIMEOUT', 5))
+        self.memory = TTLCache(int(os.getenv('OMDB_CACHE_SIZE', 2048)))
+        cache_db = os.getenv('OMDB_CACHE_DB')
+        self.disk = SQLiteCache(cache_db) if cache_db else None
+
+        self.session = requests.Session()
+        retries = Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=16, max_retries=retries)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def cache_key(params):
+        """Normalize request parameters so equivalent lookups share one entry"""
+        return urlencode(sorted(
+            (key.lower(), str(value).strip().lower())
+            for key, value in params.items() if key != 'apikey' and value is not None
+        ))
+
+    def get(self, params, fresh=False):
+        """Return the OMDb JSON response for params, or None if the request failed.
+
+        fresh=True skips the cached copies (the new response is still cached).
+        """
+        key = self.cache_key(params)
+        data = None if fresh else self.memory.get(key)
+        if data is not None:
+            return data
+        if self.disk and not fresh:
+            data = self.disk.get(key)
+            if data is not None:
+                self.memory.set(key, data, self.ttl)
+                return data
+
+        with self._lock:
+            pending = self._pending.get(key)
+            leader = pending is None
+            if leader:
+                pending = self._pending[key] = _PendingRequest()
+
+        if not leader:
+            pending.done.wait(self.timeout * 3)
+            return pending.result
+
+        try:
+            pending.result = self._fetch(key, params)
+            return pending.result
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending.done.set()
+
+    def _fetch(self, key, params):
+        try:
+            response = self.session.get(
+                OMDB_BASE_URL,
+                params={**params, 'apikey': os.getenv('OMDB_API_KEY')},
+                timeout=self.timeout
+            )
+            if response.status_code == 401:
+                # Invalid key or request limit reached, OMDb explains which in the body
+                data = response.json()
+                logger.error(f"OMDB API error: {data.get('Error')}")
+                return data
+            response.raise_for_status()
+            data = response.json()
+        except (requests.RequestException, ValueError) as e:
+            logger.error(f"OMDB API error: {str(e)}")
+            return None
+
+        if limit_reached(data):
+            logger.error(f"OMDB API error: {data.get('Error')}")
+            return data
+        ttl = self.ttl if data.get('Response') != 'False' else self.not_found_ttl
+        self.memory.set(key, data, ttl)
+        if self.disk:
+            self.disk.set(key, data, ttl)
+        return data
+
+
+# Create a singleton instance
+omdb = OmdbClient()
@@ -0,0 +1,62 @@
+"""
+Keyset (cursor) pagination.
+
+A page is fetched with "WHERE (sort columns) > (values of the last row)"
+instead of OFFSET, so every page costs the same no matter how deep it is.
+The cursor handed to clients is the sort values of the last row, encoded.
+"""
+import json
+import base64
+from datetime import datetime
+from sqlalchemy import DateTime, and_, or_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+def page_size(value, default=DEFAULT_PAGE_SIZE):
+    """Parse a limit parameter, raises ValueError if it is not a positive number"""
+    if value in (None, ''):
+        return default
+    size = int(value)
+    if size < 1:
+        raise ValueError("limit must be positive")
+    return min(size, MAX_PAGE_SIZE)
+
+def encode_cursor(values):
+    data = json.dumps([value.isoformat() if isinstance(value, datetime) else value for value in values])
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor, columns):
+    """Decode a cursor for the given sort columns, raises ValueError if it is malformed"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ValueError("Invalid cursor")
+    return [
+        datetime.fromisoformat(value) if isinstance(column.type, DateTime) and value is not None else value
+        for column, value in zip(columns, values)
+    ]
+
+def _after(columns, values, descending):
+    """Rows that come after values in (columns) order"""
+    conditions = []
+    for index, (column, value) in enumerate(zip(columns, values)):
+        beyond = column < value if descending else column > value
+        conditions.append(and_(*[c == v for c, v in zip(columns[:index], values[:index])], beyond))
+    return or_(*conditions)
+
+def paginate(query, columns, cursor=None, limit=DEFAULT_PAGE_SIZE, descending=False):
+    """Return (items, next_cursor) for one page of query ordered by columns.
+
+    The last column must be unique (usually the primary key) so that the
+    order is total. next_cursor is None on the last page.
+    """
+    if cursor:
+        query = query.filter(_after(columns, decode_cursor(cursor, columns), descending))
+    order = [column.desc() if descending else column.asc() for column in columns]
+    rows = query.add_columns(*columns).order_by(*order).limit(limit + 1).all()
+
+    next_cursor = encode_cursor(rows[limit - 1][1:]) if len(rows) > limit else None
+    return [row[0] for row in rows[:limit]], next_cursor
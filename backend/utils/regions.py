@@ -0,0 +1,36 @@
+"""
+Regions users can live in, with the streaming services offered there and the
+werstreamt.es site that lists them.
+
+The site of a region can be overridden with SCRAPER_SITE_<REGION>, e.g.
+SCRAPER_SITE_AT=https://www.werstreamt.es/at.
+"""
+import os
+
+DEFAULT_REGION = 'DE'
+
+REGIONS = {
+    'DE': {
+        'services': ['Netflix', 'Disney+', 'Amazon Prime', 'Apple TV+', 'Sky', 'WOW'],
+        'site': 'https://www.werstreamt.es',
+    },
+    'AT': {
+        'services': ['Netflix', 'Disney+', 'Amazon Prime', 'Apple TV+', 'Sky', 'WOW'],
+        'site': 'https://www.werstreamt.es/at',
+    },
+    'CH': {
+        'services': ['Netflix', 'Disney+', 'Amazon Prime', 'Apple TV+', 'Sky'],
+        'site': 'https://www.werstreamt.es/ch',
+    },
+}
+
+def is_valid_region(region):
+    return region in REGIONS
+
+def services_for(region):
+    """Streaming services offered in a region, empty for unknown regions"""
+    return REGIONS.get(region, {}).get('services', [])
+
+def site_for(region):
+    """Base URL of the werstreamt.es site listing the region's offers"""
+    return os.getenv(f'SCRAPER_SITE_{region}', REGIONS.get(region, REGIONS[DEFAULT_REGION])['site']).rstrip('/')
@@ -0,0 +1,35 @@
+"""
+Scrape worker, runs the background jobs outside of the web server.
+
+Start it on as many hosts as you like (python worker.py) and set
+SCHEDULER_ENABLED=false for the web processes. The workers elect one leader
+through a lease in the database, which alone fires the scheduled jobs; the
+movies of every scrape run are leased to the workers of all processes in
+small batches, so they split the catalog without overlap.
+"""
+import logging
+import signal
+import time
+
+from app import app
+from scheduler import init_scheduler, shutdown_scheduler
+
+logger = logging.getLogger(__name__)
+
+def main():
+    def stop(signum, frame):
+        raise SystemExit(0)
+    signal.signal(signal.SIGTERM, stop)
+
+    init_scheduler(app, join_runs=True)
+    logger.info("Scrape worker started")
+    try:
+        while True:
+            time.sleep(60)
+    except (KeyboardInterrupt, SystemExit):
+        logger.info("Stopping scrape worker")
+    finally:
+        shutdown_scheduler(app)
+
+if __name__ == '__main__':
+    main()
@@ -12,20 +12,11 @@ import AdminPanel from './components/AdminPanel';
 import StreamingServices from './components/StreamingServices';
 import { ResetPasswordForm } from './components/PasswordReset';
 
-interface Movie {
-  id: number;
-  movie_id: string;
-  title: string;
-  poster?: string;
-  year?: string;
-  added_at: string;
-}
-
 interface MovieList {
   id: number;
   name: string;
   is_default: boolean;
-  movies: Movie[];
+  movie_count?: number;
 }
 
 const MenuBar: React.FC<{ 
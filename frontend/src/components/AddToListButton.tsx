@@ -45,6 +45,7 @@ const AddToListButton: React.FC<AddToListButtonProps> = ({
       setError(null);
       try {
         const response = await axios.get('http://localhost:5000/api/movie-lists', {
+          params: { summary: 'true' },
           withCredentials: true
         });
         setLists(response.data);
@@ -18,6 +18,7 @@ const AdminPanel: React.FC = () => {
     const [activeTab, setActiveTab] = useState<'env'|'scraping'|'users'>('env');
     const [envVars, setEnvVars] = useState<EnvVars>({});
     const [users, setUsers] = useState<User[]>([]);
+    const [nextUsersCursor, setNextUsersCursor] = useState<string | null>(null);
     const [isLoading, setIsLoading] = useState(false);
     const [error, setError] = useState<string | null>(null);
     const [success, setSuccess] = useState<string | null>(null);
@@ -46,14 +47,16 @@ const AdminPanel: React.FC = () => {
         }
     };
 
-    const fetchUsers = async () => {
+    const fetchUsers = async (cursor: string | null = null) => {
         setIsLoading(true);
         setError(null);
         try {
             const response = await axios.get('http://localhost:5000/api/admin/users', {
+                params: cursor ? { cursor } : {},
                 withCredentials: true
             });
-            setUsers(response.data);
+            setUsers(cursor ? [...users, ...response.data] : response.data);
+            setNextUsersCursor(response.headers['x-next-cursor'] || null);
         } catch (err: any) {
             setError(err.response?.data?.error || 'Failed to fetch users');
         } finally {
@@ -91,12 +94,12 @@ const AdminPanel: React.FC = () => {
         setError(null);
         setSuccess(null);
         try {
-            await axios.post(
+            const response = await axios.post(
                 'http://localhost:5000/api/admin/scrape',
                 {},
                 { withCredentials: true }
             );
-            setSuccess('Scraping process started');
+            setSuccess(`Scraping process started (run ${response.data.run_id})`);
         } catch (err: any) {
             setError(err.response?.data?.error || 'Failed to start scraping');
         } finally {
@@ -276,6 +279,15 @@ const AdminPanel: React.FC = () => {
                                     ))}
                                 </tbody>
                             </table>
+                            {nextUsersCursor && (
+                                <button
+                                    onClick={() => fetchUsers(nextUsersCursor)}
+                                    className="load-more-button"
+                                    disabled={isLoading}
+                                >
+                                    Load more
+                                </button>
+                            )}
                         </div>
                     )}
                 </div>
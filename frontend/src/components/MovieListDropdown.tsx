@@ -1,20 +1,11 @@
 import React, { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
 
-interface Movie {
-  id: number;
-  movie_id: string;
-  title: string;
-  poster?: string;
-  year?: string;
-  added_at: string;
-}
-
 interface MovieList {
   id: number;
   name: string;
   is_default: boolean;
-  movies: Movie[];
+  movie_count?: number;
   created_at: string;
 }
 
@@ -39,6 +30,7 @@ const MovieListDropdown: React.FC<MovieListDropdownProps> = ({ onListSelect }) =
       try {
         console.log('Fetching movie lists...');
         const response = await axios.get('http://localhost:5000/api/movie-lists', {
+          params: { summary: 'true' },
           withCredentials: true
         });
         console.log('Received lists:', response.data);
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useAuth } from '../contexts/AuthContext';
 import axios from 'axios';
+import { StreamingAvailability } from '../services/movieApi';
 
 interface Movie {
   id: number;
@@ -9,13 +10,14 @@ interface Movie {
   poster?: string;
   year?: string;
   added_at: string;
+  availability?: StreamingAvailability[];
 }
 
 interface MovieList {
   id: number;
   name: string;
   is_default: boolean;
-  movies: Movie[];
+  movie_count?: number;
 }
 
 interface MovieListViewProps {
@@ -24,22 +26,34 @@ interface MovieListViewProps {
   onClose: () => void;
 }
 
-const MovieListView: React.FC<MovieListViewProps> = ({ list: initialList, onMovieSelect, onClose }) => {
+const PAGE_SIZE = 50;
+
+const MovieListView: React.FC<MovieListViewProps> = ({ list, onMovieSelect, onClose }) => {
   const { user } = useAuth();
-  const [list, setList] = useState<MovieList | null>(initialList);
+  const [movies, setMovies] = useState<Movie[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
 
-  const fetchListData = async () => {
-    if (!initialList) return;
+  // Loads one page of entries, the first page replaces what is shown
+  const fetchListData = async (cursor: string | null = null) => {
+    if (!list) return;
     
     setIsLoading(true);
     setError(null);
     try {
-      const response = await axios.get(`http://localhost:5000/api/movie-lists/${initialList.id}`, {
+      // Availability of the movies comes with the page, flagged against the user's services
+      const response = await axios.get(`http://localhost:5000/api/movie-lists/${list.id}/movies`, {
+        params: {
+          include: 'availability',
+          subscribed_only: 'true',
+          limit: PAGE_SIZE,
+          ...(cursor ? { cursor } : {})
+        },
         withCredentials: true
       });
-      setList(response.data);
+      setMovies(cursor ? [...movies, ...response.data] : response.data);
+      setNextCursor(response.headers['x-next-cursor'] || null);
     } catch (err) {
       console.error('Error fetching list data:', err);
       setError('Failed to load list data');
@@ -49,8 +63,9 @@ const MovieListView: React.FC<MovieListViewProps> = ({ list: initialList, onMovi
   };
 
   useEffect(() => {
+    setMovies([]);
     fetchListData();
-  }, [initialList?.id]);
+  }, [list?.id]);
 
   const handleRemoveMovie = async (movie: Movie, event: React.MouseEvent) => {
     event.stopPropagation(); // Prevent movie selection when clicking remove
@@ -68,8 +83,7 @@ const MovieListView: React.FC<MovieListViewProps> = ({ list: initialList, onMovi
         `http://localhost:5000/api/movie-lists/${list.id}/movies/${movie.movie_id}`,
         { withCredentials: true }
       );
-      // Refresh the list data
-      await fetchListData();
+      setMovies(movies.filter(m => m.id !== movie.id));
     } catch (err) {
       console.error('Error removing movie:', err);
       setError('Failed to remove movie from list');
@@ -85,23 +99,23 @@ const MovieListView: React.FC<MovieListViewProps> = ({ list: initialList, onMovi
       <div className="movie-list-header">
         <button className="back-button" onClick={onClose}>← Back</button>
         <h2>{list.name}</h2>
-        <div className="movie-count">{list.movies.length} movies</div>
+        <div className="movie-count">{nextCursor && list.movie_count !== undefined ? list.movie_count : movies.length} movies</div>
       </div>
 
       {error && (
         <div className="error-message">{error}</div>
       )}
 
-      {isLoading ? (
+      {isLoading && movies.length === 0 ? (
         <div className="loading-message">Loading...</div>
-      ) : list.movies.length === 0 ? (
+      ) : movies.length === 0 ? (
         <div className="empty-list">
           <p>No movies in this list yet</p>
           <p>Search for movies above to add them to your list</p>
         </div>
       ) : (
         <div className="movie-grid">
-          {list.movies.map((movie) => (
+          {movies.map((movie) => (
             <div 
               key={movie.id} 
               className="movie-card" 
@@ -125,11 +139,28 @@ const MovieListView: React.FC<MovieListViewProps> = ({ list: initialList, onMovi
                   </button>
                 </div>
                 {movie.year && <span className="movie-year">{movie.year}</span>}
+                {movie.availability && movie.availability.length > 0 && (
+                  <div className="streaming-services-list">
+                    {movie.availability.map(avail => (
+                      <div key={avail.id} className="streaming-service">{avail.service}</div>
+                    ))}
+                  </div>
+                )}
               </div>
             </div>
           ))}
         </div>
       )}
+
+      {nextCursor && (
+        <button
+          className="load-more-button"
+          onClick={() => fetchListData(nextCursor)}
+          disabled={isLoading}
+        >
+          {isLoading ? 'Loading...' : 'Load more'}
+        </button>
+      )}
     </div>
   );
 };
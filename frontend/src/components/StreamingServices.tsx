@@ -8,6 +8,8 @@ interface StreamingServicesProps {
 const StreamingServices: React.FC<StreamingServicesProps> = ({ onServicesChange }) => {
   const [services, setServices] = useState<string[]>([]);
   const [selectedServices, setSelectedServices] = useState<string[]>([]);
+  const [region, setRegion] = useState<string>('');
+  const [regions, setRegions] = useState<string[]>([]);
   const [isOpen, setIsOpen] = useState(false);
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
@@ -31,17 +33,22 @@ const StreamingServices: React.FC<StreamingServicesProps> = ({ onServicesChange
       setIsLoading(true);
       setError(null);
       try {
-        const [servicesResponse, preferencesResponse] = await Promise.all([
+        const [servicesResponse, preferencesResponse, regionResponse] = await Promise.all([
           axios.get('http://localhost:5000/api/services', {
             withCredentials: true
           }),
           axios.get('http://localhost:5000/api/user/services', {
             withCredentials: true
+          }),
+          axios.get('http://localhost:5000/api/user/region', {
+            withCredentials: true
           })
         ]);
 
         setServices(servicesResponse.data);
         setSelectedServices(preferencesResponse.data);
+        setRegion(regionResponse.data.region);
+        setRegions(regionResponse.data.regions);
         
         // Only call onServicesChange on initial mount
         if (isInitialMount.current) {
@@ -79,6 +86,27 @@ const StreamingServices: React.FC<StreamingServicesProps> = ({ onServicesChange
     }
   };
 
+  const handleRegionChange = async (newRegion: string) => {
+    try {
+      const response = await axios.put(
+        'http://localhost:5000/api/user/region',
+        { region: newRegion },
+        { withCredentials: true }
+      );
+      const servicesResponse = await axios.get('http://localhost:5000/api/services', {
+        withCredentials: true
+      });
+
+      setRegion(response.data.region);
+      setServices(servicesResponse.data);
+      setSelectedServices(response.data.streaming_services);
+      onServicesChange(response.data.streaming_services);
+    } catch (err) {
+      console.error('Error updating region:', err);
+      setError('Failed to update region');
+    }
+  };
+
   return (
     <div className="streaming-services-container" ref={dropdownRef}>
       <button
@@ -102,6 +130,14 @@ const StreamingServices: React.FC<StreamingServicesProps> = ({ onServicesChange
             <div className="loading-message">Loading...</div>
           ) : (
             <div className="services-list">
+              <label className="service-item">
+                <span className="service-name">Region</span>
+                <select value={region} onChange={(e) => handleRegionChange(e.target.value)}>
+                  {regions.map((code) => (
+                    <option key={code} value={code}>{code}</option>
+                  ))}
+                </select>
+              </label>
               {services.map((service) => (
                 <label key={service} className="service-item">
                   <input
@@ -36,6 +36,7 @@ export interface StreamingAvailability {
   available_from: string | null;
   available_until: string | null;
   region: string;
+  subscribed?: boolean;
 }
 
 export const searchMovies = async (query: string): Promise<MovieSearchResult[]> => {
@@ -75,4 +76,24 @@ export const getStreamingAvailability = async (movieId: string): Promise<Streami
     console.error('Error fetching streaming availability:', error);
     return [];
   }
-}; 
\ No newline at end of file
+};
+
+export const getStreamingAvailabilityBatch = async (
+  movieIds: string[],
+  subscribedOnly = false
+): Promise<Record<string, StreamingAvailability[]>> => {
+  if (movieIds.length === 0) return {};
+
+  try {
+    const response = await axios.post(`${BASE_URL}/streaming/batch`, {
+      movie_ids: movieIds,
+      subscribed_only: subscribedOnly
+    }, {
+      withCredentials: true
+    });
+    return response.data;
+  } catch (error) {
+    console.error('Error fetching streaming availability:', error);
+    return {};
+  }
+};